@@ -1,6 +1,6 @@
 """ Utility functions for AST manipulation. """
 import ast
-from typing import List, Optional
+from typing import Dict, List, Optional, Set
 
 
 def build_ast(code: str) -> ast.AST:
@@ -157,6 +157,41 @@ def extract_body(function_node: ast.FunctionDef) -> str:
     return ast.unparse(body)
 
 
+def extract_identifiers(function_node: ast.FunctionDef) -> Set[str]:
+    """Extract the identifiers referenced in the body of a function.
+
+    These are names, attribute names, names of nested definitions and imported
+    names, collected in one walk over the body (docstrings excluded, as in
+    `extract_body`).
+
+    Args:
+        function_node (ast.FunctionDef): the function node
+
+    Returns:
+        Set[str]: the identifiers in the body of the function
+    """
+    identifiers = set()
+    for stmt in function_node.body:
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Str):
+            continue
+
+        for node in ast.walk(stmt):
+            if isinstance(node, ast.Name):
+                identifiers.add(node.id)
+            elif isinstance(node, ast.Attribute):
+                identifiers.add(node.attr)
+            elif isinstance(
+                node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+            ):
+                identifiers.add(node.name)
+            elif isinstance(node, ast.alias):
+                identifiers.update(node.name.split("."))
+                if node.asname:
+                    identifiers.add(node.asname)
+
+    return identifiers
+
+
 def find_def_node(
     astree: ast.AST, def_name: str, def_type: Optional[ast.AST] = None
 ) -> ast.AST:
@@ -216,3 +251,28 @@ def find_all_def_nodes(
             def_nodes.append(node)
 
     return def_nodes
+
+
+def index_def_nodes(
+    astree: ast.AST, def_type: Optional[ast.AST] = None
+) -> Dict[str, List[ast.AST]]:
+    """Index all definitions of functions/classes in an AST by name.
+
+    Args:
+        astree (ast.AST): the AST to index
+
+    Returns:
+        Dict[str, List[ast.AST]]: definition nodes for each name, in the order
+        of `find_all_def_nodes`
+    """
+
+    definition_types = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+    if def_type is not None:
+        definition_types = (def_type,)
+
+    def_nodes = {}
+    for node in ast.walk(astree):
+        if isinstance(node, definition_types):
+            def_nodes.setdefault(node.name, []).append(node)
+
+    return def_nodes
@@ -54,7 +54,7 @@ if __name__ == "__main__":
         for child in ast.iter_child_nodes(node):
             child.parent = node
 
-    pdg = construct_pdg(program_node)
+    pdg = construct_pdg(program_node, render_to=".")
 
     # Get the target node
     target_ast_node = program_node.body[0].body[-1]
@@ -1,34 +1,44 @@
 """perform interprocedural backwards slicing using pybc"""
 
 import astunparse
+from typing import Optional
 import gast as ast
 
 from python_graphs.program_utils import program_to_ast
 
 from yappy.ast.astutils import add_parent_info
-from yappy.pdg.pypdg import construct_pdg, ProgramDependenceGraph
-from yappy.callgraph.pycg import RepoEntity, RepoCallGraph, construct_cg
+from yappy.pdg.pypdg import ProgramDependenceGraph
+from yappy.pdg.cache import PDG_CACHE, PDGCache
+from yappy.callgraph.pycg import RepoEntity, RepoCallGraph, SanityMode, construct_cg
 from yappy.backwardslice.pybc import compute_backward_slice
 from yappy.backwardslice.utils import (
     print_code_with_highlights,
     get_func_code,
     find_callsite,
-    get_call_chains,
 )
+from yappy.callgraph.callchains import MAX_CHAIN_DEPTH, MAX_CHAINS, iter_call_chains
 
 
-def get_callsite_bc(caller_func: RepoEntity, called_func: RepoEntity):
+def get_callsite_bc(
+    caller_func: RepoEntity,
+    called_func: RepoEntity,
+    pdg_cache: Optional[PDGCache] = None,
+):
     """Given a caller function and a called function, return the backward slice of the callsite.
     Args:
         caller_func (RepoEntity): the caller function
         called_func (RepoEntity): the called function
+        pdg_cache (PDGCache, optional): cache of caller PDGs, shared across
+            call chains. Defaults to None (the shared PDG_CACHE).
     Returns:
         set: the set of pdg nodes in the backward slice of the callsite
     """
+    if pdg_cache is None:
+        pdg_cache = PDG_CACHE
 
     caller_code = get_func_code(caller_func)
     caller_ast = add_parent_info(program_to_ast(caller_code))
-    caller_pdg = construct_pdg(caller_ast)
+    caller_pdg = pdg_cache.get_pdg(caller_code, caller_ast)
 
     callsite_node = find_callsite(caller_ast, called_func.name)
     if callsite_node is None:
@@ -42,7 +52,12 @@ def get_callsite_bc(caller_func: RepoEntity, called_func: RepoEntity):
 
 
 def get_interproc_slice(
-    repo_cg: RepoCallGraph, target_func: RepoEntity, target_ast_node: ast.stmt
+    repo_cg: RepoCallGraph,
+    target_func: RepoEntity,
+    target_ast_node: ast.stmt,
+    pdg_cache: Optional[PDGCache] = None,
+    max_depth: Optional[int] = MAX_CHAIN_DEPTH,
+    max_chains: Optional[int] = MAX_CHAINS,
 ):
     """Given a target function and line number, return the interprocedural slice.
 
@@ -50,11 +65,19 @@ def get_interproc_slice(
         repo_cg (RepoCallGraph): call graph of the repository
         target_func (RepoEntity): the target function
         target_node (ast.stmt): the target statement in the target function
+        pdg_cache (PDGCache, optional): cache of caller PDGs. Defaults to None
+            (the shared PDG_CACHE).
+        max_depth (int, optional): maximum number of callers in a call chain.
+            Defaults to MAX_CHAIN_DEPTH (None for unbounded).
+        max_chains (int, optional): maximum number of call chains sliced.
+            Defaults to MAX_CHAINS (None for all chains).
 
     Returns:
         set: the set of pdg nodes in the interprocedural slice of the target node
     """
-    call_chains = get_call_chains(target_func, repo_cg)
+    call_chains = iter_call_chains(
+        repo_cg, target_func, max_depth=max_depth, max_chains=max_chains
+    )
     interprocedural_slice = set()
 
     for idx, call_chain in enumerate(call_chains):
@@ -68,7 +91,7 @@ def get_interproc_slice(
             else:
                 print("[In] caller: ", caller)
                 print("[Find] callee: ", callee)
-                bc = get_callsite_bc(caller, callee)
+                bc = get_callsite_bc(caller, callee, pdg_cache)
                 # interprocedural_slice.update(bc)
                 # print(bc)
 
@@ -81,7 +104,7 @@ def get_interproc_slice(
 
 if __name__ == "__main__":
     repo_path = "../data/yt-fts"
-    cg, _, _ = construct_cg(repo_path)
+    cg, _, _ = construct_cg(repo_path, sanity=SanityMode.SKIP)
     repo_cg = RepoCallGraph(repo_path=repo_path, pycg_dict=cg)
 
     target_func = RepoEntity(id="yt_fts.download.get_vid_title", repo_path=repo_path)
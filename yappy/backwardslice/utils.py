@@ -1,8 +1,10 @@
 import astunparse
+from typing import Optional
 import gast as ast
 from termcolor import colored
 
 from yappy.callgraph.pycg import RepoEntity, RepoCallGraph
+from yappy.callgraph.callchains import MAX_CHAIN_DEPTH, MAX_CHAINS, iter_call_chains
 
 
 def print_code_with_highlights(code, backward_slice):
@@ -138,47 +140,23 @@ def find_callsite(caller_ast, callee_name):
     return visitor.callsite
 
 
-def get_call_chains_helper(
-    func_name: str,
+def get_call_chains(
+    func_name: RepoEntity,
     repo_cg: RepoCallGraph,
-    call_chain: list,
-    call_chains: list,
-    visited: set,
+    max_depth: Optional[int] = MAX_CHAIN_DEPTH,
+    max_chains: Optional[int] = MAX_CHAINS,
 ):
-    """Helper function for get_call_chains.
-    Args:
-        func_name (str): name of the function
-        repo_cg (RepoCallGraph): call graph of the repository
-        call_chain (list): call chain of the function
-        call_chains (list): call chains of the function
-        visited (set): visited functions
-    """
-    if func_name in visited:
-        return
-
-    visited.add(func_name)
-    call_chain.append(func_name)
-
-    if func_name not in repo_cg.inv_call_graph:
-        call_chains.append(call_chain.copy())
-        call_chain.pop()
-        return
-
-    for caller in repo_cg.inv_call_graph[func_name]:
-        get_call_chains_helper(caller, repo_cg, call_chain, call_chains, visited)
-
-    call_chain.pop()
-
-
-def get_call_chains(func_name: str, repo_cg: RepoCallGraph):
     """Given a function name, return its call chains.
     Args:
-        func_name (str): name of the function
+        func_name (RepoEntity): the function
         repo_cg (RepoCallGraph): call graph of the repository
+        max_depth (int, optional): maximum number of callers in a chain.
+            Defaults to MAX_CHAIN_DEPTH (None for unbounded).
+        max_chains (int, optional): maximum number of chains. Defaults to
+            MAX_CHAINS (None for all chains, which may be exponentially many).
     Returns:
-        list: call chains of the function
+        list: call chains of the function (see `iter_call_chains`)
     """
-    call_chains, call_chain = [], []
-    visited = set()
-    get_call_chains_helper(func_name, repo_cg, call_chain, call_chains, visited)
-    return call_chains
+    return list(
+        iter_call_chains(repo_cg, func_name, max_depth=max_depth, max_chains=max_chains)
+    )
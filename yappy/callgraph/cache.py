@@ -0,0 +1,119 @@
+"""On-disk cache for call graphs, keyed by the contents of a repository."""
+
+import os
+import json
+import hashlib
+from typing import Iterator, Optional, Tuple
+
+
+def iter_python_files(repo_path: str) -> Iterator[str]:
+    """Iterate over the python files of a repository in a stable order.
+
+    Args:
+        repo_path (str): path to the repository
+
+    Yields:
+        str: absolute path to each python file
+    """
+    for root, dirs, files in os.walk(repo_path):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(".py"):
+                yield os.path.abspath(os.path.join(root, file))
+
+
+def hash_file(file_path: str) -> str:
+    """Hash the contents of a file.
+
+    Args:
+        file_path (str): path to the file
+
+    Returns:
+        str: hex digest of the file contents
+    """
+    with open(file_path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def hash_repo(repo_path: str, *salt: object) -> str:
+    """Hash every python file of a repository (path and contents).
+
+    Args:
+        repo_path (str): path to the repository
+        salt (object): extra values mixed into the key (e.g., pycg version)
+
+    Returns:
+        str: hex digest identifying the repository state
+    """
+    digest = hashlib.sha256()
+    for value in salt:
+        digest.update(repr(value).encode())
+        digest.update(b"\0")
+
+    for file_path in iter_python_files(repo_path):
+        digest.update(os.path.relpath(file_path, repo_path).encode())
+        digest.update(b"\0")
+        digest.update(hash_file(file_path).encode())
+
+    return digest.hexdigest()
+
+
+def load_cached_cg(
+    cache_dir: str, key: str
+) -> Optional[Tuple[dict, dict, Optional[dict]]]:
+    """Load a cached call graph triple.
+
+    Args:
+        cache_dir (str): path to the cache directory
+        key (str): cache key (see `hash_repo`)
+
+    Returns:
+        Optional[Tuple[dict, dict, Optional[dict]]]: call graph, its inverse,
+        and sanity checks (None if they were not computed); None on a cache miss
+    """
+    cache_file = os.path.join(cache_dir, key + ".json")
+    if not os.path.exists(cache_file):
+        return None
+
+    try:
+        with open(cache_file, "r") as file:
+            entry = json.load(file)
+    except (OSError, ValueError):
+        # a corrupt or partially written entry is a miss
+        return None
+
+    return entry["cgraph"], entry["inverse_cgraph"], entry["sanity_checks"]
+
+
+def store_cached_cg(
+    cache_dir: str,
+    key: str,
+    cgraph: dict,
+    inverse_cgraph: dict,
+    sanity_checks: Optional[dict],
+) -> None:
+    """Store a call graph triple in the cache.
+
+    Args:
+        cache_dir (str): path to the cache directory
+        key (str): cache key (see `hash_repo`)
+        cgraph (dict): call graph
+        inverse_cgraph (dict): inverse call graph
+        sanity_checks (dict, optional): sanity checks of the call graph, or None
+            if they were not computed
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = os.path.join(cache_dir, key + ".json")
+
+    # write then rename so concurrent readers never see a partial entry
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temp_file, "w") as file:
+        json.dump(
+            {
+                "cgraph": cgraph,
+                "inverse_cgraph": inverse_cgraph,
+                "sanity_checks": sanity_checks,
+            },
+            file,
+        )
+    os.replace(temp_file, cache_file)
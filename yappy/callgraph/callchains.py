@@ -0,0 +1,74 @@
+"""Call chain enumeration over the inverse call graph of a repository."""
+
+from typing import Iterator, List, Optional
+
+from yappy.callgraph.pycg import RepoEntity, RepoCallGraph
+
+# default limits where all chains are consumed (e.g., `get_call_chains`); the
+# number of chains can grow exponentially with their depth
+MAX_CHAIN_DEPTH = 32
+MAX_CHAINS = 1000
+
+
+def iter_call_chains(
+    repo_cg: RepoCallGraph,
+    target: RepoEntity,
+    max_depth: Optional[int] = None,
+    max_chains: Optional[int] = None,
+) -> Iterator[List[RepoEntity]]:
+    """Lazily enumerate the call chains of a function.
+
+    A call chain starts at the target and follows callers up the inverse call
+    graph, e.g., [target, caller, caller's caller, ...]. Every simple path is
+    reported (paths may share prefixes); a chain ends at an entity that has no
+    callers, whose callers are all already on the chain (a cycle), or at
+    `max_depth`. The traversal is an iterative depth-first search, so deep
+    graphs do not hit the recursion limit.
+
+    Args:
+        repo_cg (RepoCallGraph): call graph of the repository
+        target (RepoEntity): the function
+        max_depth (int, optional): maximum number of callers in a chain; longer
+            chains are truncated. Defaults to None (unbounded).
+        max_chains (int, optional): maximum number of chains to report.
+            Defaults to None (all chains).
+
+    Yields:
+        List[RepoEntity]: call chains of the function
+    """
+    if max_chains is not None and max_chains <= 0:
+        return
+
+    inv_call_graph = repo_cg.inv_call_graph
+    chain, on_chain = [target], {target}
+
+    # for each entity on the chain: its remaining callers, and if it was extended
+    frames = [[iter(dict.fromkeys(inv_call_graph.get(target, ()))), False]]
+    num_chains = 0
+
+    while frames:
+        frame = frames[-1]
+
+        caller = None
+        if max_depth is None or len(chain) <= max_depth:
+            for candidate in frame[0]:
+                if candidate not in on_chain:
+                    caller = candidate
+                    break
+
+        if caller is not None:
+            frame[1] = True
+            chain.append(caller)
+            on_chain.add(caller)
+            frames.append([iter(dict.fromkeys(inv_call_graph.get(caller, ()))), False])
+            continue
+
+        # no (more) callers to extend the chain with
+        if not frame[1]:
+            yield list(chain)
+            num_chains += 1
+            if max_chains is not None and num_chains >= max_chains:
+                return
+
+        frames.pop()
+        on_chain.discard(chain.pop())
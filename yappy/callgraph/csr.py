@@ -0,0 +1,343 @@
+"""
+A compact call graph backend. Entities are integer ids (their index in a sorted
+string table) and the call graph and its inverse are stored as compressed sparse
+row (CSR) arrays:
+
+    callees of entity i: indices[indptr[i] : indptr[i + 1]]
+    callers of entity i: inv_indices[inv_indptr[i] : inv_indptr[i + 1]]
+
+RepoEntity objects are only materialized when iterating the graph.
+
+Compact call graphs can be written to a binary file and opened with mmap, so the
+arrays (and string table) are used in place without parsing or materializing
+the graph. The file layout, in native byte order with 8-byte aligned sections:
+
+    header: magic, byte order, version, #entities (n), #edges (m), sizes
+    repo path (utf-8)
+    string table offsets (n + 1 int64), string table (utf-8 ids, sorted)
+    indptr (n + 1 int64), indices (m int64), types (m int8)
+    inv_indptr (n + 1 int64), inv_indices (m int64)
+"""
+
+import sys
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
+
+from yappy.callgraph.pycg import (
+    CalleeType,
+    RepoCallGraph,
+    RepoEntity,
+    get_repo_modules,
+)
+
+# CalleeType codes stored per edge; 0 means untyped
+CALLEE_TYPES: Dict[int, Optional[CalleeType]] = {0: None}
+CALLEE_TYPES.update({callee_type.value: callee_type for callee_type in CalleeType})
+
+BINARY_MAGIC = b"YPCG"
+BINARY_VERSION = 1
+# magic, byte order, version, n, m, repo path size, string table size (48 bytes)
+BINARY_HEADER = struct.Struct("=4sc3xI4Q4x")
+BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+class StringTable:
+    """A read-only sequence of strings over utf-8 bytes and int64 offsets."""
+
+    def __init__(self, offsets: Sequence[int], blob: memoryview):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return str(self.blob[self.offsets[i] : self.offsets[i + 1]], "utf-8")
+
+
+class CompactCallGraph:
+    def __init__(
+        self,
+        repo_path: str,
+        ids: Sequence[str],
+        indptr: Sequence[int],
+        indices: Sequence[int],
+        types: Sequence[int],
+        inv_indptr: Sequence[int],
+        inv_indices: Sequence[int],
+    ):
+        self.repo_path = repo_path
+        self.ids = ids  # sorted
+        self.indptr = indptr
+        self.indices = indices
+        self.types = types  # CalleeType code per edge in `indices`
+        self.inv_indptr = inv_indptr
+        self.inv_indices = inv_indices
+        self.mmap = None  # backing file map, if opened with `open_binary`
+        # modules of the repo, walked on first use (see `entity`)
+        self.repo_modules: Optional[Set[str]] = None
+
+    @classmethod
+    def from_repo_cg(cls, repo_cg: RepoCallGraph) -> "CompactCallGraph":
+        """Build a compact call graph from a RepoCallGraph.
+
+        Args:
+            repo_cg (RepoCallGraph): call graph of the repository
+
+        Returns:
+            CompactCallGraph: the compact call graph
+        """
+        calls = {caller.id: callees for caller, callees in repo_cg}
+        ids = sorted(
+            set(calls) | {callee.id for callees in calls.values() for callee in callees}
+        )
+        index = {id: i for i, id in enumerate(ids)}
+
+        indptr, indices, types = array("q", [0]), array("q"), array("b")
+        in_degree = [0] * len(ids)
+        for id in ids:
+            for callee in calls.get(id, ()):
+                callee_index = index[callee.id]
+                indices.append(callee_index)
+                types.append(callee.type.value if callee.type else 0)
+                in_degree[callee_index] += 1
+            indptr.append(len(indices))
+
+        # counting sort of the edges by callee
+        inv_indptr = array("q", [0])
+        for degree in in_degree:
+            inv_indptr.append(inv_indptr[-1] + degree)
+
+        inv_indices = array("q", bytes(8 * len(indices)))
+        fill = array("q", inv_indptr[:-1])
+        for caller_index in range(len(ids)):
+            for edge in range(indptr[caller_index], indptr[caller_index + 1]):
+                callee_index = indices[edge]
+                inv_indices[fill[callee_index]] = caller_index
+                fill[callee_index] += 1
+
+        compact_cg = cls(
+            repo_cg.repo_path, ids, indptr, indices, types, inv_indptr, inv_indices
+        )
+        compact_cg.repo_modules = repo_cg.repo_modules
+        return compact_cg
+
+    @classmethod
+    def from_pycg(
+        cls, repo_path: str, pycg_dict: Dict[str, List[str]]
+    ) -> "CompactCallGraph":
+        """Build a compact call graph from a PyCG call graph."""
+        return cls.from_repo_cg(RepoCallGraph(repo_path, pycg_dict))
+
+    ############ Binary format ############
+
+    def write_binary(self, file_path: str):
+        """Write the compact call graph to a binary file (see module docs).
+
+        Args:
+            file_path (str): path to the output file
+        """
+        encoded_ids = [id.encode("utf-8") for id in self.ids]
+        offsets = array("q", [0])
+        for encoded_id in encoded_ids:
+            offsets.append(offsets[-1] + len(encoded_id))
+
+        repo_path = self.repo_path.encode("utf-8")
+        sections = [
+            repo_path,
+            offsets.tobytes(),
+            b"".join(encoded_ids),
+            array("q", self.indptr).tobytes(),
+            array("q", self.indices).tobytes(),
+            array("b", self.types).tobytes(),
+            array("q", self.inv_indptr).tobytes(),
+            array("q", self.inv_indices).tobytes(),
+        ]
+
+        with open(file_path, "wb") as file:
+            file.write(
+                BINARY_HEADER.pack(
+                    BINARY_MAGIC,
+                    BYTE_ORDER,
+                    BINARY_VERSION,
+                    len(self.ids),
+                    len(self.indices),
+                    len(repo_path),
+                    offsets[-1],
+                )
+            )
+            for section in sections:
+                file.write(section)
+                file.write(bytes(-len(section) % 8))  # align the next section
+
+    @classmethod
+    def open_binary(
+        cls, file_path: str, repo_path: Optional[str] = None
+    ) -> "CompactCallGraph":
+        """Open a binary call graph file with mmap, without loading it.
+
+        Args:
+            file_path (str): path to the binary file
+            repo_path (str, optional): path to the repository. Defaults to None
+                (the path the graph was built for).
+
+        Raises:
+            ValueError: if the file is not a compact call graph for this platform
+
+        Returns:
+            CompactCallGraph: a call graph backed by the file
+        """
+        with open(file_path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(buffer)
+        magic, order, version, n, m, path_size, blob_size = BINARY_HEADER.unpack_from(
+            view
+        )
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError(f"Not a compact call graph file: {file_path}")
+        if order != BYTE_ORDER:
+            raise ValueError(f"Call graph file has a different byte order: {file_path}")
+
+        position = BINARY_HEADER.size
+
+        def section(size: int, format: Optional[str] = None):
+            nonlocal position
+            data = view[position : position + size]
+            position += size + (-size % 8)
+            return data.cast(format) if format else data
+
+        stored_repo_path = str(section(path_size), "utf-8")
+        offsets = section(8 * (n + 1), "q")
+        ids = StringTable(offsets, section(blob_size))
+
+        compact_cg = cls(
+            repo_path or stored_repo_path,
+            ids,
+            indptr=section(8 * (n + 1), "q"),
+            indices=section(8 * m, "q"),
+            types=section(m, "b"),
+            inv_indptr=section(8 * (n + 1), "q"),
+            inv_indices=section(8 * m, "q"),
+        )
+        compact_cg.mmap = buffer
+        return compact_cg
+
+    def close(self):
+        """Release the backing file map (if any); the graph is unusable after.
+
+        NOTE: views of the arrays taken by callers (e.g., slices of `indices`)
+        must be released first; the lookups below only return copies.
+        """
+        if self.mmap is not None:
+            for name in ("indptr", "indices", "types", "inv_indptr", "inv_indices"):
+                getattr(self, name).release()
+            self.ids.offsets.release()
+            self.ids.blob.release()
+            self.mmap.close()
+            self.mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    ############ Lookups ############
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, entity: Union[str, RepoEntity]) -> bool:
+        try:
+            self.index_of(entity)
+        except KeyError:
+            return False
+        return True
+
+    def index_of(self, entity: Union[str, RepoEntity]) -> int:
+        """Return the integer id of an entity (or entity id)."""
+        id = entity.id if isinstance(entity, RepoEntity) else entity
+        i = bisect_left(self.ids, id)
+        if i == len(self.ids) or self.ids[i] != id:
+            raise KeyError(id)
+        return i
+
+    def entity(self, i: int, type_code: int = 0) -> RepoEntity:
+        """Materialize the RepoEntity with integer id i."""
+        if self.repo_modules is None:
+            self.repo_modules = get_repo_modules(self.repo_path)
+        entity = RepoEntity(self.ids[i], self.repo_path, self.repo_modules)
+        entity.type = CALLEE_TYPES[type_code]
+        return entity
+
+    # copies, so that no views of a file map outlive `close`
+    def callee_indices(self, i: int) -> List[int]:
+        return self.indices[self.indptr[i] : self.indptr[i + 1]].tolist()
+
+    def caller_indices(self, i: int) -> List[int]:
+        return self.inv_indices[self.inv_indptr[i] : self.inv_indptr[i + 1]].tolist()
+
+    def callees_of(self, entity: Union[str, RepoEntity]) -> List[RepoEntity]:
+        """Return the callees of an entity, as in RepoCallGraph.call_graph."""
+        i = self.index_of(entity)
+        return [
+            self.entity(self.indices[edge], self.types[edge])
+            for edge in range(self.indptr[i], self.indptr[i + 1])
+        ]
+
+    def callers_of(self, entity: Union[str, RepoEntity]) -> List[RepoEntity]:
+        """Return the callers of an entity, as in RepoCallGraph.inv_call_graph."""
+        return [self.entity(j) for j in self.caller_indices(self.index_of(entity))]
+
+    def reachable(
+        self, entity: Union[str, RepoEntity], inverse: bool = False
+    ) -> Iterator[str]:
+        """Yield the ids of all entities reachable from an entity (breadth-first).
+
+        Args:
+            entity (Union[str, RepoEntity]): the start entity (or its id)
+            inverse (bool, optional): follow callers instead of callees.
+                Defaults to False.
+
+        Yields:
+            str: ids of the reachable entities, excluding the start entity
+            unless it is on a cycle
+        """
+        indptr, indices = (
+            (self.inv_indptr, self.inv_indices)
+            if inverse
+            else (self.indptr, self.indices)
+        )
+        visited = bytearray(len(self.ids))
+        queue = deque([self.index_of(entity)])
+        while queue:
+            i = queue.popleft()
+            for edge in range(indptr[i], indptr[i + 1]):
+                j = indices[edge]
+                if not visited[j]:
+                    visited[j] = 1
+                    queue.append(j)
+                    yield self.ids[j]
+
+    ############ RepoCallGraph API ############
+
+    def as_dict(self) -> Dict[str, List[str]]:
+        return {
+            caller.id: [callee.id for callee in callees] for caller, callees in self
+        }
+
+    # iterator over (caller, callees), like RepoCallGraph
+    def __iter__(self) -> Iterator[Tuple[RepoEntity, List[RepoEntity]]]:
+        for i in range(len(self.ids)):
+            if self.indptr[i] != self.indptr[i + 1]:
+                yield self.entity(i), [
+                    self.entity(self.indices[edge], self.types[edge])
+                    for edge in range(self.indptr[i], self.indptr[i + 1])
+                ]
@@ -1,13 +1,24 @@
 import os
+import re
 import ast
 import inspect
 import shutil
+import uuid
 import importlib.util
-from typing import List
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Set
+
+# matches any relative (`from .`) or wildcard (`import *`) import
+FIXABLE_IMPORT_PATTERN = re.compile(r"\bfrom\s+\.|\bimport\s*\*")
 
 
 def get_all_module_members(module_path: str) -> List[str]:
-    """Get all members of a module.
+    """Get all members of a module, as imported by `from module import *`.
+
+    These are the names in the module's `__all__` if it is statically known,
+    and all public top-level names (definitions, assignments, and imports)
+    otherwise.
 
     Args:
         module_path (str): path to the module
@@ -17,11 +28,120 @@ def get_all_module_members(module_path: str) -> List[str]:
     """
     with open(module_path, "r") as file:
         tree = ast.parse(file.read())
-    return [
-        node.name
-        for node in ast.walk(tree)
-        if isinstance(node, (ast.FunctionDef, ast.ClassDef))
-    ]
+
+    exported = get_static_all(tree)
+    if exported is not None:
+        return exported
+
+    members = []
+    for node in iter_top_level_statements(tree.body):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            members.append(node.name)
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                members.extend(
+                    name.id for name in ast.walk(target) if isinstance(name, ast.Name)
+                )
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                if alias.name != "*":
+                    members.append(alias.asname or alias.name.split(".")[0])
+
+    members = [member for member in members if not member.startswith("_")]
+    return list(dict.fromkeys(members))
+
+
+def iter_top_level_statements(body: List[ast.stmt]) -> Iterator[ast.stmt]:
+    """Iterate over the statements at the top level of a module, including
+    those nested in module-level if/try/with blocks."""
+    for node in body:
+        yield node
+        if isinstance(node, (ast.If, ast.Try, ast.With)):
+            for field in ("body", "orelse", "finalbody"):
+                yield from iter_top_level_statements(getattr(node, field, []))
+            for handler in getattr(node, "handlers", []):
+                yield from iter_top_level_statements(handler.body)
+
+
+def get_static_all(tree: ast.Module) -> Optional[List[str]]:
+    """Get the names in a module's `__all__`.
+
+    Args:
+        tree (ast.Module): the module's AST
+
+    Returns:
+        Optional[List[str]]: the names, or None if `__all__` is undefined or
+        not a literal list of strings
+    """
+    exported = None
+    for node in iter_top_level_statements(tree.body):
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "__all__"
+            for target in node.targets
+        ):
+            value, exported = node.value, []
+        elif (
+            isinstance(node, (ast.AnnAssign, ast.AugAssign))
+            and isinstance(node.target, ast.Name)
+            and node.target.id == "__all__"
+        ):
+            value = node.value
+            if not isinstance(node, ast.AugAssign) or exported is None:
+                exported = []
+        elif (
+            isinstance(node, ast.Expr)
+            and isinstance(node.value, ast.Call)
+            and isinstance(node.value.func, ast.Attribute)
+            and isinstance(node.value.func.value, ast.Name)
+            and node.value.func.value.id == "__all__"
+            and node.value.func.attr == "extend"
+            and len(node.value.args) == 1
+            and exported is not None
+        ):
+            value = node.value.args[0]
+        else:
+            continue
+
+        if not isinstance(value, (ast.List, ast.Tuple)) or not all(
+            isinstance(elt, ast.Constant) and isinstance(elt.value, str)
+            for elt in value.elts
+        ):
+            return None
+        exported.extend(elt.value for elt in value.elts)
+
+    return exported
+
+
+class ModuleMemberIndex:
+    """Repo-scoped index of module members for wildcard import expansion.
+
+    Each module is parsed at most once per index. Pickled copies (e.g., sent to
+    the workers of a process pool) resolve to one index per process.
+    """
+
+    _instances: Dict[str, "ModuleMemberIndex"] = {}
+
+    def __init__(self, token: Optional[str] = None):
+        self.token = token or uuid.uuid4().hex
+        self.members: Dict[str, List[str]] = {}
+
+    def get(self, module_path: str) -> List[str]:
+        """Get all members of a module (see `get_all_module_members`)."""
+        module_path = os.path.abspath(module_path)
+        if module_path not in self.members:
+            self.members[module_path] = get_all_module_members(module_path)
+        return self.members[module_path]
+
+    def __reduce__(self):
+        return (shared_member_index, (self.token,))
+
+
+def shared_member_index(token: str) -> ModuleMemberIndex:
+    """Get this process' instance of the member index with a given token."""
+    if token not in ModuleMemberIndex._instances:
+        ModuleMemberIndex._instances[token] = ModuleMemberIndex(token)
+    return ModuleMemberIndex._instances[token]
 
 
 def get_package_name(file_path: str) -> str:
@@ -41,20 +161,103 @@ def get_package_name(file_path: str) -> str:
     return ".".join(reversed(parts))
 
 
-def fix_file_imports(file_path: str) -> None:
-    """Fix imports in a file.
+def get_module_name(file_path: str, repo_path: str) -> str:
+    """Get the dotted name of a module, as PyCG names it.
 
     Args:
-        file_path (str): path to the file
+        file_path (str): path to the module file
+        repo_path (str): path to the repository
 
-    Raises:
-        SyntaxError: if the file has syntax errors
+    Returns:
+        str: name of the module (packages are named without `__init__`)
+    """
+    parts = os.path.splitext(os.path.relpath(file_path, repo_path))[0].split(os.sep)
+    if parts[-1] == "__init__":
+        parts = parts[:-1]
+    return ".".join(parts)
+
+
+def get_module_imports(file_path: str, module_name: str) -> Set[str]:
+    """Get the names of all modules (possibly) imported by a module.
+
+    Args:
+        file_path (str): path to the module file
+        module_name (str): name of the module
+
+    Returns:
+        Set[str]: absolute names of imported modules and their parent packages
     """
     with open(file_path, "r") as file:
         try:
             tree = ast.parse(file.read())
         except SyntaxError:
-            raise SyntaxError("Syntax error in file: {}".format(file_path))
+            return set()
+
+    is_package = os.path.basename(file_path) == "__init__.py"
+    package_parts = (
+        module_name.split(".") if is_package else module_name.split(".")[:-1]
+    )
+
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base_parts = node.module.split(".") if node.module else []
+            if node.level > 0:
+                base_parts = (
+                    package_parts[: len(package_parts) - (node.level - 1)] + base_parts
+                )
+            base = ".".join(base_parts)
+            # `from x import y` may import either a member of x or a submodule x.y
+            names = [base] + [f"{base}.{alias.name}" for alias in node.names]
+        else:
+            continue
+
+        for name in names:
+            parts = name.split(".")
+            imported.update(".".join(parts[:i]) for i in range(1, len(parts) + 1))
+
+    imported.discard("")
+    return imported
+
+
+def needs_import_fixes(source: str) -> bool:
+    """Cheaply check if a source may contain relative or wildcard imports.
+
+    Args:
+        source (str): source code of a file
+
+    Returns:
+        bool: False if the source certainly has nothing for `fix_source_imports`
+    """
+    return FIXABLE_IMPORT_PATTERN.search(source) is not None
+
+
+def fix_source_imports(
+    source: str, file_path: str, member_index: Optional[ModuleMemberIndex] = None
+) -> str:
+    """Fix imports in the source code of a file.
+
+    Args:
+        source (str): source code of the file
+        file_path (str): path to the file (used to resolve relative imports)
+        member_index (ModuleMemberIndex, optional): index shared by wildcard
+            expansions. Defaults to None (a fresh index).
+
+    Raises:
+        SyntaxError: if the file has syntax errors
+
+    Returns:
+        str: source code with fixed imports
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        raise SyntaxError("Syntax error in file: {}".format(file_path))
+
+    if member_index is None:
+        member_index = ModuleMemberIndex()
 
     for node in ast.walk(tree):
         # check if it is an importFrom node
@@ -77,16 +280,47 @@ def fix_file_imports(file_path: str) -> None:
             # convert any wildcard imports to explicit imports
             if node.names[0].name == "*":
                 if os.path.exists(module_file):
-                    all_members = get_all_module_members(module_file)
+                    all_members = member_index.get(module_file)
                     node.names = [
                         ast.alias(name=member, asname=None) for member in all_members
                     ]
 
+    return ast.unparse(tree)
+
+
+def fix_file_imports(
+    file_path: str,
+    member_index: Optional[ModuleMemberIndex] = None,
+    source_path: Optional[str] = None,
+) -> None:
+    """Fix imports in a file.
+
+    Args:
+        file_path (str): path to the file
+        member_index (ModuleMemberIndex, optional): index shared by wildcard
+            expansions. Defaults to None (a fresh index).
+        source_path (str, optional): path to the unmodified original of the
+            file (e.g., in the repository a copy was made from), against which
+            imports are resolved. Defaults to None (the file itself).
+
+    Raises:
+        SyntaxError: if the file has syntax errors
+    """
+    with open(file_path, "r") as file:
+        source = file.read()
+
+    if not needs_import_fixes(source):
+        return
+
+    source = fix_source_imports(source, source_path or file_path, member_index)
+
     with open(file_path, "w") as file:
-        file.write(ast.unparse(tree))
+        file.write(source)
 
 
-def fix_repo_imports(repo_path: str) -> str:
+def fix_repo_imports(
+    repo_path: str, overlay: bool = False, workers: Optional[int] = None
+) -> str:
     """Fix imports in a repository.
     Fixes:
         1. relative imports -> absolute imports
@@ -94,6 +328,11 @@ def fix_repo_imports(repo_path: str) -> str:
 
     Args:
         repo_path (str): path to the repository
+        overlay (bool, optional): build a sparse overlay of the repo's python
+            files instead of copying the whole tree. Only files whose imports
+            change are written; the rest are symlinked. Defaults to False.
+        workers (int, optional): number of processes fixing files in parallel.
+            Defaults to None (fix files in this process).
 
     Returns:
         str: path to temp copy of the fixed repository
@@ -101,11 +340,115 @@ def fix_repo_imports(repo_path: str) -> str:
     if os.path.exists(repo_path + "_temp"):
         shutil.rmtree(repo_path + "_temp")
 
+    if overlay:
+        return build_import_overlay(repo_path, repo_path + "_temp", workers=workers)
+
     temp_path = shutil.copytree(repo_path, repo_path + "_temp")
 
-    for root, _, files in os.walk(temp_path):
+    # resolve imports against the original files, which (unlike the copies)
+    # are not rewritten while other files are being fixed
+    file_paths, source_paths = [], []
+    for root, _, files in os.walk(repo_path):
+        temp_root = os.path.join(temp_path, os.path.relpath(root, repo_path))
         for file in files:
             if file.endswith(".py"):
-                fix_file_imports(os.path.join(root, file))
+                file_paths.append(os.path.join(temp_root, file))
+                source_paths.append(os.path.join(root, file))
 
+    member_index = ModuleMemberIndex()
+    map_files(
+        fix_file_imports,
+        file_paths,
+        [member_index] * len(file_paths),
+        source_paths,
+        workers=workers,
+    )
     return temp_path
+
+
+def build_import_overlay(
+    repo_path: str, overlay_path: str, workers: Optional[int] = None
+) -> str:
+    """Mirror the python files of a repository, with fixed imports.
+
+    Args:
+        repo_path (str): path to the repository
+        overlay_path (str): path to the (new) overlay directory
+        workers (int, optional): number of processes fixing files in parallel.
+            Defaults to None (fix files in this process).
+
+    Returns:
+        str: path to the overlay
+    """
+    source_files, overlay_files = [], []
+    for root, _, files in os.walk(repo_path):
+        overlay_root = os.path.join(overlay_path, os.path.relpath(root, repo_path))
+
+        for file in files:
+            if file.endswith(".py"):
+                os.makedirs(overlay_root, exist_ok=True)
+                source_files.append(os.path.join(root, file))
+                overlay_files.append(os.path.join(overlay_root, file))
+
+    member_index = ModuleMemberIndex()
+    map_files(
+        partial(overlay_file_imports, member_index=member_index),
+        source_files,
+        overlay_files,
+        workers=workers,
+    )
+
+    os.makedirs(overlay_path, exist_ok=True)
+    return overlay_path
+
+
+def overlay_file_imports(
+    source_file: str,
+    overlay_file: str,
+    member_index: Optional[ModuleMemberIndex] = None,
+) -> None:
+    """Mirror a python file into an overlay, with fixed imports.
+
+    Args:
+        source_file (str): path to the file in the repository
+        overlay_file (str): path to the file in the overlay
+        member_index (ModuleMemberIndex, optional): index shared by wildcard
+            expansions. Defaults to None (a fresh index).
+    """
+    with open(source_file, "r") as f:
+        source = f.read()
+
+    if needs_import_fixes(source):
+        with open(overlay_file, "w") as f:
+            f.write(fix_source_imports(source, source_file, member_index))
+        return
+
+    try:
+        os.symlink(os.path.abspath(source_file), overlay_file)
+    except OSError:
+        shutil.copy2(source_file, overlay_file)
+
+
+def map_files(
+    function: Callable, *file_lists: List, workers: Optional[int] = None
+) -> List:
+    """Apply a function to files, optionally across a process pool.
+
+    Args:
+        function (Callable): a (picklable) function of one path per file list
+        file_lists (List): lists of file paths (or per-file arguments),
+            zipped like `map`
+        workers (int, optional): number of processes. Defaults to None
+            (apply the function in this process).
+
+    Returns:
+        List: the results of the function, in order
+    """
+    if workers is None or workers <= 1:
+        return list(map(function, *file_lists))
+
+    # a few chunks per worker amortize IPC while keeping the load balanced
+    chunksize = max(1, len(file_lists[0]) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # collect the results so that errors in workers are raised here
+        return list(executor.map(function, *file_lists, chunksize=chunksize))
@@ -8,29 +8,200 @@ Call Graph Generation in Python. In 43rd International Conference on Software En
 """
 
 import os
+import copy
+import json
+import time
+import shutil
 import packaging
 import pkg_resources
 from packaging import version
 from enum import Enum, auto
-from typing import List, Dict, Set, Tuple, Optional
+from collections.abc import Mapping
+from typing import Callable, Iterable, List, Dict, Set, Tuple, Optional, Union
 
 
 import pycg
-from pycg import formats
+from pycg import formats, utils
 from pycg.pycg import CallGraphGenerator as CallGraphGeneratorPyCG
-
-from yappy.callgraph.imports import fix_repo_imports
-from yappy.ast.astutils import build_ast, find_all_def_nodes, extract_body
+from pycg.processing.preprocessor import PreProcessor
+from pycg.processing.postprocessor import PostProcessor
+from pycg.processing.cgprocessor import CallGraphProcessor
+from pycg.processing.keyerrprocessor import KeyErrProcessor
+
+from yappy.callgraph.imports import (
+    fix_repo_imports,
+    get_module_name,
+    get_module_imports,
+    map_files,
+)
+from yappy.callgraph.stream import iter_pycg_json
+from yappy.callgraph.shard import (
+    ShardSummary,
+    build_shard_overlay,
+    get_shard_path,
+    get_shards_root,
+    shard_repo_files,
+    stitch_shards,
+    summarize_shard,
+)
+from yappy.callgraph.reachability import ReachabilityIndex
+from yappy.callgraph.cache import (
+    iter_python_files,
+    hash_file,
+    hash_repo,
+    load_cached_cg,
+    store_cached_cg,
+)
+from yappy.ast.astutils import build_ast_file, index_def_nodes, extract_identifiers
 
 
 ############ PyCG Wrapper ############
 
+
+class AnalysisPhase(Enum):
+    """Enum for the passes of a PyCG run."""
+
+    PREPROCESSING = auto()
+    ITERATION = auto()
+    CALL_GRAPH = auto()
+
+
+class AnalysisProgress:
+    """Progress of a PyCG run, reported after each pass.
+
+    Args:
+        phase (AnalysisPhase): the pass that finished
+        iteration (int): number of fixed-point iterations so far
+        elapsed (float): seconds taken by the pass
+        total_elapsed (float): seconds since the run started
+        edges (int): number of points-to edges after the preprocessing pass
+            and iterations; number of call graph edges after the final pass
+        timed_out (bool): the fixed-point was cut short by the time budget
+    """
+
+    __slots__ = ("phase", "iteration", "elapsed", "total_elapsed", "edges", "timed_out")
+
+    def __init__(
+        self,
+        phase: AnalysisPhase,
+        iteration: int,
+        elapsed: float,
+        total_elapsed: float,
+        edges: int,
+        timed_out: bool = False,
+    ):
+        self.phase = phase
+        self.iteration = iteration
+        self.elapsed = elapsed
+        self.total_elapsed = total_elapsed
+        self.edges = edges
+        self.timed_out = timed_out
+
+    def __repr__(self):
+        return (
+            f"AnalysisProgress({self.phase.name}, iteration={self.iteration}, "
+            f"elapsed={self.elapsed:.3f}s, edges={self.edges})"
+        )
+
+
 pycg_version = pkg_resources.get_distribution("pycg").version
 if packaging.version.Version(pycg_version) > packaging.version.Version("0.0.3"):
 
     class CallGraphGenerator(CallGraphGeneratorPyCG):
-        def __init__(self, entry_points, package, max_iter=-1, operation="call-graph"):
+        """PyCG's call graph generator, with a time budget for the fixed-point
+        iterations and progress reporting.
+
+        Args:
+            timeout (float, optional): seconds after which no further fixed-point
+                iterations are started; the call graph is then built from the
+                (unconverged) state reached so far. The preprocessing and the
+                final call graph pass always run. Defaults to None (no budget).
+            progress (Callable, optional): called with an AnalysisProgress after
+                each pass. Defaults to None.
+        """
+
+        def __init__(
+            self,
+            entry_points,
+            package,
+            max_iter=-1,
+            operation="call-graph",
+            timeout: Optional[float] = None,
+            progress: Optional[Callable[[AnalysisProgress], None]] = None,
+        ):
             super().__init__(entry_points, package, max_iter, operation)
+            self.timeout = timeout
+            self.progress = progress
+            self.iterations = 0
+            self.timed_out = False
+            self.events: List[AnalysisProgress] = []  # progress of the last run
+
+        def analyze(self):
+            managers = (
+                self.import_manager,
+                self.scope_manager,
+                self.def_manager,
+                self.class_manager,
+                self.module_manager,
+            )
+            start = time.monotonic()
+            self.iterations, self.timed_out, self.events = 0, False, []
+
+            pass_start = time.monotonic()
+            self.do_pass(PreProcessor, True, *managers)
+            self.def_manager.complete_definitions()
+            self.report(AnalysisPhase.PREPROCESSING, start, pass_start)
+
+            while self.max_iter < 0 or self.iterations < self.max_iter:
+                if self.has_converged():
+                    break
+                if (
+                    self.timeout is not None
+                    and time.monotonic() - start >= self.timeout
+                ):
+                    self.timed_out = True
+                    break
+
+                pass_start = time.monotonic()
+                self.state = self.extract_state()
+                self.reset_counters()
+                self.do_pass(PostProcessor, False, *managers)
+                self.def_manager.complete_definitions()
+                self.iterations += 1
+                self.report(AnalysisPhase.ITERATION, start, pass_start)
+
+            self.reset_counters()
+            pass_start = time.monotonic()
+            if self.operation == utils.constants.CALL_GRAPH_OP:
+                self.do_pass(CallGraphProcessor, False, *managers, call_graph=self.cg)
+            elif self.operation == utils.constants.KEY_ERR_OP:
+                self.do_pass(KeyErrProcessor, False, *managers[:4], self.key_errs)
+            else:
+                raise Exception("Invalid operation: " + self.operation)
+            self.report(AnalysisPhase.CALL_GRAPH, start, pass_start)
+
+        def report(self, phase: AnalysisPhase, start: float, pass_start: float):
+            """Record (and report) the progress after a pass."""
+            if phase == AnalysisPhase.CALL_GRAPH:
+                edges = sum(len(callees) for callees in self.cg.get().values())
+            else:
+                edges = sum(
+                    len(defi.get_name_pointer().get())
+                    for defi in self.def_manager.get_defs().values()
+                )
+
+            now = time.monotonic()
+            event = AnalysisProgress(
+                phase,
+                self.iterations,
+                now - pass_start,
+                now - start,
+                edges,
+                self.timed_out,
+            )
+            self.events.append(event)
+            if self.progress is not None:
+                self.progress(event)
 
     pycg.pycg.CallGraphGeneratorPyCG = CallGraphGenerator
 
@@ -47,6 +218,14 @@ class CalleeType(Enum):
     EXTERNAL = auto()
 
 
+class SanityMode(Enum):
+    """Enum for when `construct_cg` computes sanity checks."""
+
+    EAGER = auto()
+    LAZY = auto()
+    SKIP = auto()
+
+
 class CallerType(Enum):
     """Enum for caller types."""
 
@@ -56,23 +235,57 @@ class CallerType(Enum):
     DEFAULT = auto()
 
 
+def get_repo_modules(repo_path: str) -> Set[str]:
+    """Return the names of all modules in a repo, e.g., `pkg.mod` for
+    `pkg/mod.py`. Walks the repo; a RepoCallGraph does so once (see
+    `RepoCallGraph.refresh_modules`).
+
+    Args:
+        repo_path (str): path to the repository
+
+    Returns:
+        Set[str]: module names
+    """
+    modules = set()
+    for root, _, files in os.walk(repo_path):
+        for file in files:
+            if file.endswith(".py"):
+                module_path = os.path.relpath(os.path.join(root, file), repo_path)
+                modules.add(module_path[:-3].replace(os.sep, "."))
+    return modules
+
+
 class RepoModule:
-    def __init__(self, name: str, repo_path: str):
+    __slots__ = ("name", "repo_path", "repo_modules")
+
+    def __init__(
+        self, name: str, repo_path: str, repo_modules: Optional[Set[str]] = None
+    ):
         self.name = name
         self.repo_path = repo_path
+        self.repo_modules = repo_modules  # see `get_repo_modules`
 
     @property
     def file_path(self) -> str:
         return os.path.join(self.repo_path, *self.name.split(".")) + ".py"
 
     def exists(self) -> bool:
-        return os.path.exists(self.file_path)
+        if self.repo_modules is None:
+            return os.path.exists(self.file_path)
+        return self.name in self.repo_modules
 
 
 class RepoEntity:
-    def __init__(self, id: str, repo_path: str):
+    __slots__ = ("id", "repo_path", "repo_modules", "_module", "type")
+
+    def __init__(
+        self, id: str, repo_path: str, repo_modules: Optional[Set[str]] = None
+    ):
         self.id = id  # abc.xyz.[...].entity
         self.repo_path = repo_path
+        # module names of the repo, if known (see `get_repo_modules`);
+        # otherwise, modules are looked up on disk
+        self.repo_modules = repo_modules
         self._module = None  # internal module object
         self.module = self.id  # triggers property setter
         self.type = None
@@ -92,20 +305,21 @@ class RepoEntity:
 
     @module.setter
     def module(self, id: str):
-        module_from_function = lambda function: ".".join(function.split(".")[:-1])
-        module_from_method = lambda method: ".".join(method.split(".")[:-2])
-
-        func_module = RepoModule(module_from_function(id), self.repo_path)
-        meth_module = RepoModule(module_from_method(id), self.repo_path)
+        parts = id.split(".")
 
+        func_module = RepoModule(
+            ".".join(parts[:-1]), self.repo_path, self.repo_modules
+        )
         if not func_module.exists():
-            if not meth_module.exists():
-                # FIXME: defaults to func_module; could be None?
-                self._module = func_module
-            else:
+            meth_module = RepoModule(
+                ".".join(parts[:-2]), self.repo_path, self.repo_modules
+            )
+            if meth_module.exists():
                 self._module = meth_module
-        else:
-            self._module = func_module
+                return
+
+        # FIXME: defaults to func_module; could be None?
+        self._module = func_module
 
     def exists(self) -> bool:
         if self._module:
@@ -124,6 +338,8 @@ class RepoEntity:
 
 
 class Caller(RepoEntity):
+    __slots__ = ()
+
     def __init__(self, id: str, repo_path: str):
         super().__init__(id, repo_path)
         # TODO: more granular types; currently not being used anywhere
@@ -131,6 +347,8 @@ class Caller(RepoEntity):
 
 
 class Callee(RepoEntity):
+    __slots__ = ()
+
     def __init__(self, id: str, repo_path: str):
         super().__init__(id, repo_path)
         self.type = None
@@ -141,47 +359,107 @@ class RepoCallGraph:
         self, repo_path: str, pycg_dict: Optional[Dict[str, List[str]]] = None
     ):
         self.repo_path = repo_path
+        # modules of the repo, to resolve entities against (see `refresh_modules`)
+        self.repo_modules = get_repo_modules(repo_path)
         self.call_graph: Dict[RepoEntity, List[RepoEntity]] = {}
         self.inv_call_graph: Dict[RepoEntity, List[RepoEntity]] = {}
 
+        # interned entities; callee types depend on the caller, so an id
+        # has one entity per type it is called with (see `intern`)
+        self.entities: Dict[Tuple[str, Optional[CalleeType]], RepoEntity] = {}
+
+        # built on demand, dropped on changes (see `reachability`)
+        self.reachability_index: Optional[ReachabilityIndex] = None
+
+        # per-module state for incremental updates (see `track_modules`)
+        self.module_files: Dict[str, str] = {}
+        self.module_hashes: Dict[str, str] = {}
+        self.module_imports: Dict[str, Set[str]] = {}
+
         if pycg_dict:
             self.load_pycg(pycg_dict)
 
         if self.call_graph:
             self.build_inverse_call_graph()
 
+    def intern(self, id: str, type: Optional[CalleeType] = None) -> RepoEntity:
+        """Return the graph's entity for an id (and callee type).
+
+        Args:
+            id (str): id of the entity
+            type (CalleeType, optional): type of the callee. Defaults to None.
+
+        Returns:
+            RepoEntity: the same object for every call with these arguments
+        """
+        entity = self.entities.get((id, type))
+        if entity is not None:
+            return entity
+
+        entity = self.entities.get((id, None))
+        if entity is None:
+            entity = RepoEntity(id, self.repo_path, self.repo_modules)
+            self.entities[(id, None)] = entity
+
+        if type is not None:
+            entity = copy.copy(entity)  # shares the resolved module
+            entity.type = type
+            self.entities[(id, type)] = entity
+
+        return entity
+
     def add_call(self, caller: RepoEntity, callee: RepoEntity):
         if callee.type is None:
             if not callee.exists() and "<builtin>" in callee.id:
-                callee.type = CalleeType.BUILTIN
+                callee_type = CalleeType.BUILTIN
 
             # NOTE(@manishs): this assumes that if not a builtin,
             # and can't be found in the repo, it's an API.abs
             # this may propagate some (seems rare) FPs in
             # cgraph path analysis; e.g., calls to nested functions.
             elif not callee.exists():
-                callee.type = CalleeType.API
+                callee_type = CalleeType.API
 
-            elif caller.module.file_path == callee.module.file_path:
-                callee.type = CalleeType.LOCAL
+            elif caller.module.name == callee.module.name:
+                callee_type = CalleeType.LOCAL
 
             else:
-                callee.type = CalleeType.EXTERNAL
+                callee_type = CalleeType.EXTERNAL
+
+            callee = self.intern(callee.id, callee_type)
 
         if caller not in self.call_graph:
             self.call_graph[caller] = []
 
         self.call_graph[caller].append(callee)
+        self.reachability_index = None
+        return callee
 
     def load_pycg(self, pycg_dict: Dict[str, List[str]]):
-        for caller_id, callee_ids in pycg_dict.items():
-            caller = RepoEntity(caller_id, self.repo_path)
+        self.load_entries(pycg_dict.items())
+
+    def load_entries(self, entries: Iterable[Tuple[str, List[str]]]):
+        for caller_id, callee_ids in entries:
+            caller = self.intern(caller_id)
 
             for callee_id in callee_ids:
-                callee = RepoEntity(callee_id, self.repo_path)
+                callee = self.intern(callee_id)
                 self.add_call(caller, callee)
 
-    def load_from_json(self, file_path: str):
+    def load_from_json(self, file_path: str, stream: bool = False, lines: bool = False):
+        """Load a PyCG call graph from a JSON file.
+
+        Args:
+            file_path (str): path to the JSON file
+            stream (bool, optional): read callers one at a time instead of
+                parsing the whole file first. Defaults to False.
+            lines (bool, optional): the file is line-delimited (see
+                `iter_pycg_json`); implies streaming. Defaults to False.
+        """
+        if stream or lines:
+            self.load_entries(iter_pycg_json(file_path, lines=lines))
+            return
+
         with open(file_path, "r") as file:
             json_dict = json.load(file)
             self.load_pycg(json_dict)
@@ -203,6 +481,86 @@ class RepoCallGraph:
                     self.inv_call_graph[callee] = []
                 self.inv_call_graph[callee].append(caller)
 
+    def track_modules(self):
+        """Snapshot the repo's modules (files, content hashes, and imports).
+
+        The snapshot is the baseline that `update_cg` diffs against; take it
+        right after building the call graph from an unchanged repo.
+        """
+        self.refresh_modules()
+        self.module_files = {
+            get_module_name(file_path, self.repo_path): file_path
+            for file_path in iter_python_files(self.repo_path)
+        }
+        self.module_hashes = {
+            name: hash_file(file_path) for name, file_path in self.module_files.items()
+        }
+        self.module_imports = {
+            name: get_module_imports(file_path, name)
+            for name, file_path in self.module_files.items()
+        }
+
+    def refresh_modules(self):
+        """Rescan the repo's modules after it changed on disk.
+
+        Updates the module set in place, so existing entities see the changes.
+        """
+        modules = get_repo_modules(self.repo_path)
+        self.repo_modules.clear()
+        self.repo_modules.update(modules)
+
+    def module_of(self, id: str) -> Optional[str]:
+        """Return the tracked module that defines an entity, if any."""
+        parts = id.split(".")
+        for i in range(len(parts), 0, -1):
+            name = ".".join(parts[:i])
+            if name in self.module_files:
+                return name
+        return None
+
+    def replace_modules(self, modules: Set[str], pycg_dict: Dict[str, List[str]]):
+        """Replace the calls made from some modules, in place.
+
+        Args:
+            modules (Set[str]): names of the modules to replace
+            pycg_dict (Dict[str, List[str]]): fresh PyCG results for (at least)
+                the callers in these modules; other callers are ignored
+        """
+        stale = {
+            caller for caller in self.call_graph if self.module_of(caller.id) in modules
+        }
+
+        touched = set()
+        for caller in stale:
+            touched.update(self.call_graph.pop(caller))
+        self.reachability_index = None
+
+        for callee in touched:
+            callers = [c for c in self.inv_call_graph[callee] if c not in stale]
+            if callers:
+                self.inv_call_graph[callee] = callers
+            else:
+                del self.inv_call_graph[callee]
+
+        for caller_id, callee_ids in pycg_dict.items():
+            if self.module_of(caller_id) not in modules:
+                continue
+
+            caller = self.intern(caller_id)
+            for callee_id in callee_ids:
+                callee = self.add_call(caller, self.intern(callee_id))
+                if callee not in self.inv_call_graph:
+                    self.inv_call_graph[callee] = []
+                self.inv_call_graph[callee].append(caller)
+
+    def reachability(self) -> ReachabilityIndex:
+        """Return the transitive reachability index of the call graph, built
+        once and reused until the graph changes. Graphs too large for bitsets
+        are searched per query (see `MAX_BITSET_COMPONENTS`)."""
+        if self.reachability_index is None:
+            self.reachability_index = ReachabilityIndex(self.call_graph)
+        return self.reachability_index
+
     # iterator for self.call_graph
     def __iter__(self):
         return iter(self.call_graph.items())
@@ -211,32 +569,306 @@ class RepoCallGraph:
 ############ CG constructors and PyCG Extensions ############
 
 
-def construct_cg(repo_path: str, max_iter: int = -1) -> Tuple[dict, dict, dict]:
+def construct_cg(
+    repo_path: str,
+    max_iter: int = -1,
+    cache_dir: Optional[str] = None,
+    overlay: bool = False,
+    workers: Optional[int] = None,
+    sanity: SanityMode = SanityMode.EAGER,
+    shard: bool = False,
+    timeout: Optional[float] = None,
+    progress: Optional[Callable[[AnalysisProgress], None]] = None,
+    return_partial: bool = False,
+) -> Union[
+    Tuple[dict, dict, Optional[Mapping]], Tuple[dict, dict, Optional[Mapping], bool]
+]:
     """Generate call graph for a repository.
 
     Args:
         repo_path (str): path to the repository
         max_iter (int, optional): maximum number of PyCG iterations. Defaults to 1.
+        cache_dir (str, optional): directory for cached results. A repo whose
+            python files, pycg version and max_iter are unchanged is served from
+            the cache without running PyCG. Defaults to None (no caching).
+        overlay (bool, optional): analyze a sparse overlay of the repo's python
+            files instead of a full copy (see `fix_repo_imports`). Defaults to False.
+        workers (int, optional): number of processes for pre-processing the
+            repo and sanity checking its call graph. Defaults to None
+            (single process).
+        sanity (SanityMode, optional): compute the sanity checks eagerly,
+            lazily (per file, when a caller is first looked up), or skip them.
+            Defaults to SanityMode.EAGER.
+        shard (bool, optional): analyze each top-level package separately (in
+            up to `workers` processes) and stitch the call graphs; faster on
+            large repos, but may miss calls resolved across packages (see
+            `run_sharded_pycg`). Defaults to False.
+        timeout (float, optional): time budget in seconds for PyCG's fixed-point
+            iterations (per shard, if sharding); when exceeded, the partial call
+            graph is returned (and not cached). Defaults to None (no budget).
+        progress (Callable, optional): called with an AnalysisProgress after each
+            PyCG pass (in the worker processes, if sharding with workers).
+            Defaults to None.
+        return_partial (bool, optional): also return whether the call graph is
+            partial, i.e., the time budget cut PyCG's iterations short (always
+            False on a cache hit). Defaults to False.
 
     Returns:
-        Tuple[dict, dict]: call graph and its inverse
+        Tuple[dict, dict, Optional[Mapping]]: call graph, its inverse, and its
+        sanity checks (None if skipped); followed by the partial flag if
+        `return_partial`
     """
-    repo_path = fix_repo_imports(repo_path)
+    if cache_dir is not None:
+        cache_key = hash_repo(repo_path, pycg_version, max_iter, shard)
+        cached = load_cached_cg(cache_dir, cache_key)
+        if cached is not None:
+            cgraph, inverse_cgraph, sanity_checks = cached
+            if sanity is SanityMode.SKIP:
+                sanity_checks = None
+            elif sanity_checks is None:
+                # the cached entry was built without sanity checks
+                if sanity is SanityMode.LAZY:
+                    sanity_checks = LazySanityChecks(repo_path, cgraph)
+                else:
+                    sanity_checks = sanity_cg(repo_path, cgraph, workers=workers)
+                    store_cached_cg(
+                        cache_dir, cache_key, cgraph, inverse_cgraph, sanity_checks
+                    )
+            if return_partial:
+                return cgraph, inverse_cgraph, sanity_checks, False
+            return cgraph, inverse_cgraph, sanity_checks
+
+    fixed_path = fix_repo_imports(repo_path, overlay=overlay, workers=workers)
 
     python_files = []
-    for root, dirs, files in os.walk(repo_path):
+    for root, dirs, files in os.walk(fixed_path):
         for file in files:
             if file.endswith(".py"):
                 python_files.append(os.path.abspath(os.path.join(root, file)))
 
-    cg_generator = CallGraphGenerator(python_files, repo_path, max_iter=max_iter)
+    if shard:
+        cgraph, partial = run_sharded_pycg(
+            python_files, fixed_path, max_iter, workers, timeout, progress
+        )
+    else:
+        cgraph, partial = run_pycg(
+            python_files, fixed_path, max_iter, timeout, progress
+        )
+    inverse_cgraph = inverse_cg(cgraph)
+    # sanity checks refer to the repo itself, like on a cache hit; the fixed
+    # copy is replaced by the next analysis of the repo
+    if sanity is SanityMode.EAGER:
+        sanity_checks = sanity_cg(repo_path, cgraph, workers=workers)
+    elif sanity is SanityMode.LAZY:
+        sanity_checks = LazySanityChecks(repo_path, cgraph)
+    else:
+        sanity_checks = None
+
+    if cache_dir is not None and not partial:
+        # lazy checks are not stored; they are recomputed on a cache hit
+        store_cached_cg(
+            cache_dir,
+            cache_key,
+            cgraph,
+            inverse_cgraph,
+            sanity_checks if sanity is SanityMode.EAGER else None,
+        )
+
+    if return_partial:
+        return cgraph, inverse_cgraph, sanity_checks, partial
+    return cgraph, inverse_cgraph, sanity_checks
+
+
+def run_pycg(
+    entry_points: List[str],
+    package: str,
+    max_iter: int = -1,
+    timeout: Optional[float] = None,
+    progress: Optional[Callable[[AnalysisProgress], None]] = None,
+) -> Tuple[dict, bool]:
+    """Run PyCG and return its call graph.
+
+    Args:
+        entry_points (List[str]): python files to analyze
+        package (str): path to the (import fixed) repository
+        max_iter (int, optional): maximum number of PyCG iterations. Defaults to -1.
+        timeout (float, optional): time budget in seconds for the fixed-point
+            iterations (see CallGraphGenerator). Defaults to None (no budget).
+        progress (Callable, optional): called with an AnalysisProgress after each
+            pass. Defaults to None.
+
+    Returns:
+        Tuple[dict, bool]: call graph, and whether the time budget cut the
+        fixed-point iterations short
+    """
+    cg_generator = CallGraphGenerator(
+        entry_points, package, max_iter=max_iter, timeout=timeout, progress=progress
+    )
     cg_generator.analyze()
 
     formatter = formats.Simple(cg_generator)
-    cgraph = formatter.generate()
-    inverse_cgraph = inverse_cg(cgraph)
-    sanity_checks = sanity_cg(repo_path, cgraph)
-    return cgraph, inverse_cgraph, sanity_checks
+    return formatter.generate(), cg_generator.timed_out
+
+
+def run_sharded_pycg(
+    python_files: List[str],
+    package: str,
+    max_iter: int = -1,
+    workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    progress: Optional[Callable[[AnalysisProgress], None]] = None,
+) -> Tuple[dict, bool]:
+    """Run PyCG on each top-level package of a repository and stitch the
+    call graphs (see `yappy.callgraph.shard`).
+
+    Args:
+        python_files (List[str]): python files to analyze
+        package (str): path to the (import fixed) repository
+        max_iter (int, optional): maximum number of PyCG iterations. Defaults to -1.
+        workers (int, optional): number of processes analyzing shards in
+            parallel. Defaults to None (single process).
+        timeout (float, optional): time budget in seconds for the fixed-point
+            iterations of each shard. Defaults to None (no budget).
+        progress (Callable, optional): called with an AnalysisProgress after each
+            pass of each shard; must be picklable with workers. Defaults to None.
+
+    Returns:
+        Tuple[dict, bool]: call graph, and whether the time budget cut the
+        fixed-point iterations of any shard short
+    """
+    shards = shard_repo_files(package, python_files)
+    names = list(shards)
+
+    # drop the mirrors of previous runs (e.g., of since deleted packages)
+    if os.path.exists(get_shards_root(package)):
+        shutil.rmtree(get_shards_root(package))
+
+    results = map_files(
+        run_shard,
+        [package] * len(names),
+        names,
+        [shards[name] for name in names],
+        [max_iter] * len(names),
+        [timeout] * len(names),
+        [progress] * len(names),
+        workers=workers,
+    )
+
+    shard_cgraphs, summaries, timed_out = {}, {}, False
+    for name, (shard_cgraph, summary, shard_timed_out) in zip(names, results):
+        shard_cgraphs[name], summaries[name] = shard_cgraph, summary
+        timed_out = timed_out or shard_timed_out
+    return stitch_shards(shard_cgraphs, summaries), timed_out
+
+
+def run_shard(
+    package: str,
+    shard: str,
+    files: List[str],
+    max_iter: int = -1,
+    timeout: Optional[float] = None,
+    progress: Optional[Callable[[AnalysisProgress], None]] = None,
+) -> Tuple[dict, ShardSummary, bool]:
+    """Run PyCG on a shard of a repository, in isolation from other shards.
+
+    Args:
+        package (str): path to the (import fixed) repository
+        shard (str): name of the shard
+        files (List[str]): python files of the shard
+        max_iter (int, optional): maximum number of PyCG iterations. Defaults to -1.
+        timeout (float, optional): time budget in seconds for the fixed-point
+            iterations. Defaults to None (no budget).
+        progress (Callable, optional): called with an AnalysisProgress after each
+            pass. Defaults to None.
+
+    Returns:
+        Tuple[dict, ShardSummary, bool]: call graph and summary of the shard,
+        and whether the time budget cut its fixed-point iterations short
+    """
+    shard_path = build_shard_overlay(package, files, get_shard_path(package, shard))
+    entry_points = [
+        os.path.join(shard_path, os.path.relpath(file_path, package))
+        for file_path in files
+    ]
+    cgraph, timed_out = run_pycg(entry_points, shard_path, max_iter, timeout, progress)
+    return cgraph, summarize_shard(package, files), timed_out
+
+
+def update_cg(
+    repo_cg: RepoCallGraph,
+    max_iter: int = -1,
+    overlay: bool = False,
+    workers: Optional[int] = None,
+) -> Set[str]:
+    """Incrementally update a call graph after its repository changed.
+
+    Only the changed modules, the modules importing them, and the modules
+    calling into them are re-analyzed; their calls are patched into
+    `repo_cg.call_graph` and `repo_cg.inv_call_graph` in place.
+    Requires a baseline from `RepoCallGraph.track_modules`.
+
+    Args:
+        repo_cg (RepoCallGraph): call graph of the repository
+        max_iter (int, optional): maximum number of PyCG iterations. Defaults to -1.
+        overlay (bool, optional): analyze a sparse overlay of the repo's python
+            files instead of a full copy (see `fix_repo_imports`). Defaults to False.
+        workers (int, optional): number of processes for pre-processing the
+            repo. Defaults to None (single process).
+
+    Returns:
+        Set[str]: names of the re-analyzed modules
+    """
+    old_hashes, old_files = repo_cg.module_hashes, repo_cg.module_files
+    repo_cg.refresh_modules()
+
+    module_files = {
+        get_module_name(file_path, repo_cg.repo_path): file_path
+        for file_path in iter_python_files(repo_cg.repo_path)
+    }
+    module_hashes = {
+        name: hash_file(file_path) for name, file_path in module_files.items()
+    }
+    changed = {
+        name
+        for name in module_hashes.keys() | old_hashes.keys()
+        if module_hashes.get(name) != old_hashes.get(name)
+    }
+    if not changed:
+        return changed
+
+    for name in changed:
+        if name in module_files:
+            repo_cg.module_imports[name] = get_module_imports(module_files[name], name)
+        else:
+            repo_cg.module_imports.pop(name, None)
+
+    # importers of changed modules
+    affected = set(changed)
+    for name, imported in repo_cg.module_imports.items():
+        if imported & changed:
+            affected.add(name)
+
+    # callers into changed modules (resolved against the old modules)
+    for callee, callers in repo_cg.inv_call_graph.items():
+        if repo_cg.module_of(callee.id) in changed:
+            affected.update(repo_cg.module_of(caller.id) for caller in callers)
+    affected.discard(None)
+
+    # removed modules are only dropped, never re-analyzed
+    repo_cg.module_files = {**old_files, **module_files}
+    entry_points = [module_files[name] for name in affected if name in module_files]
+
+    temp_path = fix_repo_imports(repo_cg.repo_path, overlay=overlay, workers=workers)
+    entry_points = [
+        os.path.join(temp_path, os.path.relpath(file_path, repo_cg.repo_path))
+        for file_path in entry_points
+    ]
+    cgraph = run_pycg(entry_points, temp_path, max_iter)[0] if entry_points else {}
+
+    repo_cg.replace_modules(affected, cgraph)
+    repo_cg.module_files = module_files
+    repo_cg.module_hashes = module_hashes
+    return affected
 
 
 def inverse_cg(pycg_cgraph: dict) -> dict:
@@ -259,64 +891,197 @@ def inverse_cg(pycg_cgraph: dict) -> dict:
     return inverse_cg
 
 
-def sanity_cg(repo_path: str, pycg_cgraph: dict) -> dict:
+def sanity_cg(
+    repo_path: str,
+    pycg_cgraph: Union[dict, RepoCallGraph],
+    workers: Optional[int] = None,
+) -> dict:
     """Return sanity checks and metadata for the callgraph of a repo.
 
+    Callers are grouped by the file they are defined in, and each file is
+    checked (and parsed) once, optionally across a process pool.
+
     Args:
         repo_path (str): path to the repo
-        pycg_cgraph (dict): callgraph of the repo
+        pycg_cgraph (Union[dict, RepoCallGraph]): callgraph of the repo; an
+            already built RepoCallGraph is used as is
+        workers (int, optional): number of processes. Defaults to None
+            (single process).
     """
+    caller_ids, module_calls, file_exists = group_module_calls(repo_path, pycg_cgraph)
+
+    file_paths = list(module_calls)
+    module_checks = map_files(
+        sanity_check_module,
+        file_paths,
+        [file_exists[file_path] for file_path in file_paths],
+        [module_calls[file_path] for file_path in file_paths],
+        workers=workers,
+    )
 
     sanity_checks = {}
-    cgraph = RepoCallGraph(repo_path, pycg_cgraph)
+    for checks in module_checks:
+        sanity_checks.update(checks)
+
+    # report the callers in call graph order
+    return {caller_id: sanity_checks[caller_id] for caller_id in caller_ids}
+
+
+def group_module_calls(
+    repo_path: str, pycg_cgraph: Union[dict, RepoCallGraph]
+) -> Tuple[List[str], Dict[str, list], Dict[str, bool]]:
+    """Group the calls of a callgraph by the file defining the caller.
+
+    Args:
+        repo_path (str): path to the repo
+        pycg_cgraph (Union[dict, RepoCallGraph]): callgraph of the repo
+
+    Returns:
+        Tuple[List[str], Dict[str, list], Dict[str, bool]]: the ids of callers
+        with calls (in callgraph order), the calls of each file (see
+        `sanity_check_module`), and whether each file exists
+    """
+    if isinstance(pycg_cgraph, RepoCallGraph):
+        cgraph = pycg_cgraph
+    else:
+        cgraph = RepoCallGraph(repo_path, pycg_cgraph)
+
+    # file path -> [(caller id, caller name, [(callee id, callee name, exists)])]
+    module_calls: Dict[str, list] = {}
+    file_exists: Dict[str, bool] = {}
+    caller_ids = []
 
     for caller, callees in cgraph:
         if callees == []:
             continue
 
-        if caller not in sanity_checks:
-            sanity_checks[caller.id] = {
-                "file": caller.module.file_path,
-                "callcount": 0,
-                "uninvokedcalls": 0,
-                "unknowncalls": 0,
-                "warnings": [],
-            }
+        file_path = caller.module.file_path
+        if file_path not in module_calls:
+            module_calls[file_path] = []
+            file_exists[file_path] = caller.exists()
+
+        caller_ids.append(caller.id)
+        module_calls[file_path].append(
+            (
+                caller.id,
+                caller.name,
+                [(callee.id, callee.name, callee.exists()) for callee in callees],
+            )
+        )
+
+    return caller_ids, module_calls, file_exists
+
+
+def sanity_check_module(
+    file_path: str, exists: bool, calls: List[Tuple[str, str, list]]
+) -> dict:
+    """Run the sanity checks for the callers defined in one file.
+
+    Args:
+        file_path (str): path to the file
+        exists (bool): whether the file exists
+        calls (List[Tuple[str, str, list]]): (caller id, caller name, callees)
+            of each caller, where callees are (id, name, exists) tuples
+
+    Returns:
+        dict: sanity checks of the callers
+    """
+    sanity_checks = {}
+    def_index = None
+
+    for caller_id, caller_name, callees in calls:
+        checks = sanity_checks[caller_id] = {
+            "file": file_path,
+            "callcount": 0,
+            "uninvokedcalls": 0,
+            "unknowncalls": 0,
+            "warnings": [],
+        }
 
         # Check 1: if the function file exists
-        if not caller.exists():
-            sanity_checks[caller.id]["warnings"].append("Caller file does not exist.")
+        if not exists:
+            checks["warnings"].append("Caller file does not exist.")
             continue
 
-        with open(caller.module.file_path) as f:
-            astree = build_ast(f.read())
+        if def_index is None:
+            def_index = index_def_nodes(build_ast_file(file_path))
 
         # Check 2: if the caller is defined in the file
-        function_defs = find_all_def_nodes(astree, caller.name)
+        function_defs = def_index.get(caller_name, [])
         if len(function_defs) == 0:
-            sanity_checks[caller.id]["warnings"].append("Caller not defined in file.")
+            checks["warnings"].append("Caller not defined in file.")
             continue
 
-        function_bodies = [extract_body(function_def) for function_def in function_defs]
+        # identifiers referenced in the bodies of all definitions of the caller
+        identifiers = set()
+        for function_def in function_defs:
+            identifiers |= extract_identifiers(function_def)
 
         # Check 3: if the caller call counts are reasonable
-        sanity_checks[caller.id]["callcount"] = len(callees)
+        checks["callcount"] = len(callees)
         if len(callees) > 40:
-            sanity_checks[caller.id]["warnings"].append("Caller has > 40 calls.")
+            checks["warnings"].append("Caller has > 40 calls.")
 
-        for callee in callees:
+        for callee_id, callee_name, callee_exists in callees:
             # Check 4: if callee is in the caller's body
-            if not any([callee.name in fb for fb in function_bodies]):
-                sanity_checks[caller.id]["uninvokedcalls"] += 1
-                sanity_checks[caller.id]["warnings"].append(
-                    f"Callee {callee.id} not in caller's body."
-                )
+            if callee_name not in identifiers:
+                checks["uninvokedcalls"] += 1
+                checks["warnings"].append(f"Callee {callee_id} not in caller's body.")
 
             # Check 5: if callee file exists
-            if not callee.exists():
-                sanity_checks[caller.id]["unknowncalls"] += 1
-                sanity_checks[caller.id]["warnings"].append(
-                    f"Callee {callee.id} file does not exist."
-                )
+            if not callee_exists:
+                checks["unknowncalls"] += 1
+                checks["warnings"].append(f"Callee {callee_id} file does not exist.")
 
     return sanity_checks
+
+
+class LazySanityChecks(Mapping):
+    """Sanity checks of a callgraph (see `sanity_cg`), computed on demand.
+
+    Nothing is read until the first lookup. Looking up a caller checks all
+    callers defined in the same file, so each file is parsed at most once.
+
+    Args:
+        repo_path (str): path to the repo
+        pycg_cgraph (Union[dict, RepoCallGraph]): callgraph of the repo
+    """
+
+    def __init__(self, repo_path: str, pycg_cgraph: Union[dict, RepoCallGraph]):
+        self.repo_path = repo_path
+        self.pycg_cgraph = pycg_cgraph
+        self._caller_ids = None
+        self._caller_files: Dict[str, str] = {}
+        self._module_calls: Dict[str, list] = {}
+        self._file_exists: Dict[str, bool] = {}
+        self._checks: Dict[str, dict] = {}
+
+    def _group(self):
+        if self._caller_ids is None:
+            self._caller_ids, self._module_calls, self._file_exists = (
+                group_module_calls(self.repo_path, self.pycg_cgraph)
+            )
+            for file_path, calls in self._module_calls.items():
+                for caller_id, _, _ in calls:
+                    self._caller_files[caller_id] = file_path
+
+    def __getitem__(self, caller_id: str) -> dict:
+        if caller_id not in self._checks:
+            self._group()
+            file_path = self._caller_files[caller_id]
+            self._checks.update(
+                sanity_check_module(
+                    file_path,
+                    self._file_exists[file_path],
+                    self._module_calls[file_path],
+                )
+            )
+        return self._checks[caller_id]
+
+    def __iter__(self):
+        self._group()
+        return iter(self._caller_ids)
+
+    def __len__(self) -> int:
+        self._group()
+        return len(self._caller_ids)
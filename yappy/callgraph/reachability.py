@@ -0,0 +1,215 @@
+"""
+Transitive reachability index for call graphs. Strongly connected components
+(e.g., mutually recursive functions) are condensed with Tarjan's algorithm, and
+each component of the resulting DAG stores the components it reaches and is
+reached from as bitsets. Queries are then bit tests (or bitset scans).
+
+NOTE: bitsets take O(C^2) bits for C components in the worst case; this trades
+memory for constant-time queries on graphs queried many times. Above
+MAX_BITSET_COMPONENTS components, no bitsets are built and queries search the
+condensed DAG instead.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Set
+
+# largest number of components indexed with bitsets (at most ~25 MB of bitsets)
+MAX_BITSET_COMPONENTS = 10_000
+
+
+def strongly_connected_components(successors: List[List[int]]) -> List[List[int]]:
+    """Find the strongly connected components of a graph (iterative Tarjan).
+
+    Args:
+        successors (List[List[int]]): adjacency lists of nodes 0..n-1
+
+    Returns:
+        List[List[int]]: the components, in reverse topological order (every
+        component comes after all components it has edges to)
+    """
+    n = len(successors)
+    index, lowlink = [-1] * n, [0] * n
+    on_stack = [False] * n
+    stack, components = [], []
+    counter = 0
+
+    for root in range(n):
+        if index[root] != -1:
+            continue
+
+        # (node, position of the next successor to visit)
+        work = [(root, 0)]
+        while work:
+            node, position = work.pop()
+            if position == 0:
+                index[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+
+            for position in range(position, len(successors[node])):
+                succ = successors[node][position]
+                if index[succ] == -1:
+                    # recurse into succ, then resume node after it
+                    work.append((node, position + 1))
+                    work.append((succ, 0))
+                    break
+                if on_stack[succ]:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            else:
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+    return components
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Yield the positions of the set bits of an integer."""
+    for position, bit in enumerate(reversed(bin(bits)[2:])):
+        if bit == "1":
+            yield position
+
+
+class ReachabilityIndex:
+    """Precomputed transitive callers and callees of a call graph.
+
+    Args:
+        call_graph: mapping from callers to lists of callees, e.g.,
+            RepoCallGraph.call_graph
+        max_components (int, optional): largest number of strongly connected
+            components to build bitsets for; larger graphs are searched per
+            query. Defaults to MAX_BITSET_COMPONENTS.
+    """
+
+    def __init__(self, call_graph: Dict, max_components: int = MAX_BITSET_COMPONENTS):
+        self.entities = {}  # id -> entity
+        for caller, callees in call_graph.items():
+            self.entities.setdefault(caller.id, caller)
+            for callee in callees:
+                self.entities.setdefault(callee.id, callee)
+
+        ids = list(self.entities)
+        node_of = {id: node for node, id in enumerate(ids)}
+        successors = [[] for _ in ids]
+        for caller, callees in call_graph.items():
+            successors[node_of[caller.id]].extend(
+                node_of[callee.id] for callee in callees
+            )
+
+        components = strongly_connected_components(successors)
+        self.members: List[List] = [
+            [self.entities[ids[node]] for node in component] for component in components
+        ]
+        self.component: Dict[str, int] = {}
+        for c, component in enumerate(components):
+            for node in component:
+                self.component[ids[node]] = c
+
+        # condensed DAG; successors of a component have smaller indices
+        dag_successors = [set() for _ in components]
+        self.cyclic = [len(component) > 1 for component in components]
+        for node, succs in enumerate(successors):
+            c = self.component[ids[node]]
+            for succ in succs:
+                d = self.component[ids[succ]]
+                if c == d:
+                    self.cyclic[c] = True  # includes self-recursion
+                else:
+                    dag_successors[c].add(d)
+
+        self.dag_successors = [list(succs) for succs in dag_successors]
+        self.dag_predecessors: List[List[int]] = [[] for _ in components]
+        for c, succs in enumerate(self.dag_successors):
+            for d in succs:
+                self.dag_predecessors[d].append(c)
+
+        # bitsets of the components each component reaches and is reached from
+        self.bitsets = len(components) <= max_components
+        self.descendants: List[int] = []
+        self.ancestors: List[int] = []
+        if not self.bitsets:
+            return
+
+        for c, succs in enumerate(self.dag_successors):
+            bits = 1 << c
+            for d in succs:
+                bits |= self.descendants[d]
+            self.descendants.append(bits)
+
+        self.ancestors = [0] * len(components)
+        for c in reversed(range(len(components))):
+            bits = 1 << c
+            for p in self.dag_predecessors[c]:
+                bits |= self.ancestors[p]
+            self.ancestors[c] = bits
+
+    def can_reach(self, caller, callee) -> bool:
+        """Whether caller (transitively) calls callee; an entity reaches itself."""
+        c, d = self.component[caller.id], self.component[callee.id]
+        if self.bitsets:
+            return bool((self.descendants[c] >> d) & 1)
+
+        # successors have smaller indices, so components below d cannot reach d
+        stack, seen = [c], {c}
+        while stack:
+            e = stack.pop()
+            if e == d:
+                return True
+            for f in self.dag_successors[e]:
+                if f >= d and f not in seen:
+                    seen.add(f)
+                    stack.append(f)
+        return False
+
+    def reached_components(self, c: int, inverse: bool = False) -> Iterable[int]:
+        """Components reachable from component c (including c), or reaching it
+        if inverse."""
+        if self.bitsets:
+            return iter_bits((self.ancestors if inverse else self.descendants)[c])
+
+        edges = self.dag_predecessors if inverse else self.dag_successors
+        stack, seen = [c], {c}
+        while stack:
+            for d in edges[stack.pop()]:
+                if d not in seen:
+                    seen.add(d)
+                    stack.append(d)
+        return seen
+
+    def _expand(self, entity, inverse: bool) -> Set:
+        c = self.component[entity.id]
+        entities = {
+            member
+            for d in self.reached_components(c, inverse)
+            for member in self.members[d]
+        }
+        if not self.cyclic[c]:
+            entities.discard(entity)
+        return entities
+
+    def transitive_callers(self, entity) -> Set:
+        """All entities that (transitively) call an entity."""
+        return self._expand(entity, inverse=True)
+
+    def transitive_callees(self, entity) -> Set:
+        """All entities (transitively) called by an entity."""
+        return self._expand(entity, inverse=False)
+
+    def entry_points(self, entity) -> Set:
+        """Transitive callers of an entity that are not called by anything."""
+        roots = set()
+        for caller in self.transitive_callers(entity):
+            c = self.component[caller.id]
+            if not self.cyclic[c] and not self.dag_predecessors[c]:
+                roots.add(caller)
+        return roots
@@ -0,0 +1,245 @@
+"""
+Sharded call graph construction. A repository is split into shards (its
+top-level packages), each shard is analyzed on its own, and the per-shard call
+graphs are stitched together.
+
+PyCG only sees one shard at a time, so it reports calls into other shards by the
+names they were imported with (e.g., `pkg.Engine.start` for a class re-exported
+by `pkg/__init__.py`). These names are resolved to their definitions (e.g.,
+`pkg.core.Engine.start`) with a static summary of each shard: the functions,
+classes and methods it defines, and the names its modules import.
+
+NOTE: calls that PyCG can only resolve across shards (e.g., methods of objects
+returned by another shard) are lost; sharding trades this precision for
+analysis time that grows with the largest shard instead of the whole repo.
+"""
+
+import os
+import ast
+import shutil
+from typing import Dict, List, Optional, Set
+
+from yappy.callgraph.imports import get_module_name, iter_top_level_statements
+
+# shard of the modules at the root of a repository
+ROOT_SHARD = ""
+
+# maximum number of re-exports followed when resolving a name
+MAX_ALIAS_DEPTH = 16
+
+
+class ShardSummary:
+    """The definitions and imported names of the modules in a shard."""
+
+    def __init__(self):
+        self.top_levels: Set[str] = set()  # top-level modules/packages
+        self.definitions: Set[str] = set()  # modules, functions, classes, methods
+        self.classes: Set[str] = set()
+        self.init_classes: Set[str] = set()  # classes that define __init__
+        self.aliases: Dict[str, str] = {}  # imported name -> full name
+
+    def add_module(self, file_path: str, module_name: str):
+        """Summarize a module of the shard.
+
+        Args:
+            file_path (str): path to the module file
+            module_name (str): name of the module (see `get_module_name`)
+        """
+        self.top_levels.add(module_name.split(".")[0])
+        self.definitions.add(module_name)
+
+        with open(file_path, "r") as file:
+            try:
+                tree = ast.parse(file.read())
+            except SyntaxError:
+                return
+
+        is_package = os.path.basename(file_path) == "__init__.py"
+        package_parts = (
+            module_name.split(".") if is_package else module_name.split(".")[:-1]
+        )
+
+        for node in iter_top_level_statements(tree.body):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                self.add_definition(node, module_name)
+
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.aliases[f"{module_name}.{alias.asname}"] = alias.name
+                    else:
+                        top_level = alias.name.split(".")[0]
+                        self.aliases[f"{module_name}.{top_level}"] = top_level
+
+            elif isinstance(node, ast.ImportFrom):
+                base_parts = node.module.split(".") if node.module else []
+                if node.level > 0:
+                    base_parts = (
+                        package_parts[: len(package_parts) - (node.level - 1)]
+                        + base_parts
+                    )
+                base = ".".join(base_parts)
+                for alias in node.names:
+                    if alias.name != "*":
+                        name = alias.asname or alias.name
+                        self.aliases[f"{module_name}.{name}"] = f"{base}.{alias.name}"
+
+    def add_definition(self, node: ast.AST, scope: str):
+        """Add a function or class (and the methods of a class) to the summary."""
+        name = f"{scope}.{node.name}"
+        self.definitions.add(name)
+
+        if isinstance(node, ast.ClassDef):
+            self.classes.add(name)
+            for child in node.body:
+                if isinstance(
+                    child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+                ):
+                    self.add_definition(child, name)
+                    if child.name == "__init__":
+                        self.init_classes.add(name)
+
+
+def shard_repo_files(repo_path: str, python_files: List[str]) -> Dict[str, List[str]]:
+    """Split the python files of a repository by top-level package.
+
+    Args:
+        repo_path (str): path to the repository
+        python_files (List[str]): paths to the python files
+
+    Returns:
+        Dict[str, List[str]]: files of each shard, by top-level package name;
+        modules at the root of the repository form the ROOT_SHARD
+    """
+    shards = {}
+    for file_path in python_files:
+        parts = os.path.relpath(file_path, repo_path).split(os.sep)
+        shard = parts[0] if len(parts) > 1 else ROOT_SHARD
+        shards.setdefault(shard, []).append(file_path)
+    return shards
+
+
+def summarize_shard(repo_path: str, files: List[str]) -> ShardSummary:
+    """Summarize the modules of a shard.
+
+    Args:
+        repo_path (str): path to the repository
+        files (List[str]): paths to the python files of the shard
+
+    Returns:
+        ShardSummary: summary of the shard
+    """
+    summary = ShardSummary()
+    for file_path in files:
+        summary.add_module(file_path, get_module_name(file_path, repo_path))
+    return summary
+
+
+def build_shard_overlay(repo_path: str, files: List[str], shard_path: str) -> str:
+    """Mirror the python files of a shard (as symlinks) into a directory, so
+    that an analysis of the directory cannot follow imports into other shards.
+
+    Args:
+        repo_path (str): path to the repository
+        files (List[str]): paths to the python files of the shard
+        shard_path (str): path to the (new) shard directory
+
+    Returns:
+        str: path to the shard directory
+    """
+    if os.path.exists(shard_path):
+        shutil.rmtree(shard_path)
+    os.makedirs(shard_path)
+
+    for file_path in files:
+        shard_file = os.path.join(shard_path, os.path.relpath(file_path, repo_path))
+        os.makedirs(os.path.dirname(shard_file), exist_ok=True)
+        os.symlink(os.path.abspath(file_path), shard_file)
+
+    return shard_path
+
+
+def resolve_name(
+    name: str, summaries: Dict[str, ShardSummary], owners: Dict[str, str]
+) -> Optional[str]:
+    """Resolve a name imported from another shard to its definition.
+
+    Args:
+        name (str): a callee as reported by PyCG
+        summaries (Dict[str, ShardSummary]): summary of each shard
+        owners (Dict[str, str]): shard of each top-level module/package
+
+    Returns:
+        Optional[str]: the full name of the definition; names that are not (or
+        cannot be resolved to) definitions in the repository are returned as
+        is. None for classes without `__init__`, whose calls PyCG omits.
+    """
+    for _ in range(MAX_ALIAS_DEPTH):
+        shard = owners.get(name.split(".")[0])
+        if shard is None:
+            return name
+
+        summary = summaries[shard]
+        if name in summary.definitions:
+            # calling a class calls its constructor
+            if name in summary.init_classes:
+                return f"{name}.__init__"
+            if name in summary.classes:
+                return None
+            return name
+
+        # follow the longest imported prefix of the name
+        parts = name.split(".")
+        for i in range(len(parts), 0, -1):
+            prefix = ".".join(parts[:i])
+            if prefix in summary.aliases:
+                name = ".".join([summary.aliases[prefix]] + parts[i:])
+                break
+        else:
+            return name
+
+    return name
+
+
+def stitch_shards(
+    shard_cgraphs: Dict[str, dict], summaries: Dict[str, ShardSummary]
+) -> dict:
+    """Stitch per-shard call graphs into a call graph of the repository.
+
+    Args:
+        shard_cgraphs (Dict[str, dict]): PyCG call graph of each shard
+        summaries (Dict[str, ShardSummary]): summary of each shard
+
+    Returns:
+        dict: call graph of the repository
+    """
+    owners = {
+        top_level: shard
+        for shard, summary in summaries.items()
+        for top_level in summary.top_levels
+    }
+
+    cgraph: Dict[str, Dict[str, None]] = {}  # caller -> ordered set of callees
+    for shard, shard_cgraph in shard_cgraphs.items():
+        for caller, callees in shard_cgraph.items():
+            # another shard's names are placeholders here; its own graph has them
+            if owners.get(caller.split(".")[0], shard) != shard:
+                continue
+
+            resolved = cgraph.setdefault(caller, {})
+            for callee in callees:
+                callee = resolve_name(callee, summaries, owners)
+                if callee is not None:
+                    resolved[callee] = None
+
+    return {caller: list(callees) for caller, callees in cgraph.items()}
+
+
+def get_shards_root(repo_path: str) -> str:
+    """Get the directory the shards of a repository are mirrored into."""
+    return repo_path + "_shards"
+
+
+def get_shard_path(repo_path: str, shard: str) -> str:
+    """Get the directory a shard of a repository is mirrored into."""
+    return os.path.join(get_shards_root(repo_path), shard or "__root__")
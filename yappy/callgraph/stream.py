@@ -0,0 +1,97 @@
+"""Streaming readers for (large) PyCG call graph files."""
+
+import json
+from typing import IO, Any, Iterator, List, Tuple
+
+WHITESPACE = " \t\n\r"
+
+
+class JSONStreamReader:
+    """Decodes JSON values one at a time from a text stream, keeping only the
+    unconsumed part of the stream in memory."""
+
+    def __init__(self, file: IO[str], chunk_size: int = 1 << 16):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int):
+        """Read more of the stream into the buffer, dropping consumed text."""
+        chunk = self.file.read(size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at the end)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos : self.pos + 1]
+            self.fill(self.chunk_size)
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of `chars`."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r}, got {char!r}")
+        self.pos += 1
+        return char
+
+    def decode(self) -> Any:
+        """Decode the next JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, self.pos = self.decoder.raw_decode(self.buffer, self.pos)
+                return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # the value is incomplete: grow the buffer geometrically
+                self.fill(max(self.chunk_size, len(self.buffer) - self.pos))
+
+
+def iter_pycg_json(
+    file_path: str, lines: bool = False
+) -> Iterator[Tuple[str, List[str]]]:
+    """Iterate over the (caller, callees) entries of a PyCG call graph file.
+
+    Args:
+        file_path (str): path to the file; a JSON object mapping callers to
+            lists of callees, as written by PyCG or RepoCallGraph.write_to_json
+        lines (bool, optional): the file is line-delimited instead, with one
+            `{"caller": [callees]}` object or `["caller", [callees]]` pair per
+            line. Defaults to False.
+
+    Yields:
+        Tuple[str, List[str]]: a caller and its callees
+    """
+    with open(file_path, "r") as file:
+        if lines:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if isinstance(entry, dict):
+                    yield from entry.items()
+                else:
+                    caller, callees = entry
+                    yield caller, callees
+            return
+
+        reader = JSONStreamReader(file)
+        reader.expect("{")
+        if reader.peek() == "}":
+            return
+
+        while True:
+            caller = reader.decode()
+            reader.expect(":")
+            yield caller, reader.decode()
+            if reader.expect(",}") == "}":
+                return
@@ -0,0 +1,152 @@
+"""
+Cache for program dependence graphs of functions, keyed by a normalized hash of
+their source code: indentation and end-of-line comments do not matter, but line
+positions do, since slices are highlighted by the line numbers of PDG nodes.
+Recently used PDGs are kept in memory (LRU); evicted ones can be kept on disk.
+"""
+
+import os
+import ast
+import pickle
+import hashlib
+import textwrap
+from collections import OrderedDict
+from typing import Optional
+
+from python_graphs.program_utils import program_to_ast
+
+from yappy.ast.astutils import add_parent_info
+from yappy.pdg.pypdg import ProgramDependenceGraph, construct_pdg
+
+# bump when the pickled PDG format changes
+PDG_CACHE_VERSION = 1
+
+
+def hash_source(source: str) -> str:
+    """Hash the source code of a function, ignoring indentation and comments,
+    but not the lines its statements are on.
+
+    Args:
+        source (str): source code of the function
+
+    Returns:
+        str: hex digest of the normalized source
+    """
+    source = textwrap.dedent(source)
+    try:
+        normalized = ast.dump(ast.parse(source), include_attributes=True)
+    except SyntaxError:
+        normalized = source
+
+    digest = hashlib.sha256(f"{PDG_CACHE_VERSION}\0".encode())
+    digest.update(normalized.encode())
+    return digest.hexdigest()
+
+
+class PDGCache:
+    """An LRU cache of PDGs with an optional on-disk tier.
+
+    NOTE: a cached PDG refers to the AST it was built from; look up its nodes by
+    source (e.g., `get_node_by_source`) rather than by AST node identity.
+
+    Args:
+        maxsize (int, optional): maximum number of PDGs kept in memory.
+            Defaults to 128.
+        cache_dir (str, optional): directory for pickled PDGs. Defaults to None
+            (memory only).
+    """
+
+    def __init__(self, maxsize: int = 128, cache_dir: Optional[str] = None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self.pdgs: "OrderedDict[str, ProgramDependenceGraph]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_pdg(self, source: str, program_node=None) -> ProgramDependenceGraph:
+        """Return the PDG of a function, constructing it on a cache miss.
+
+        Args:
+            source (str): source code of the function
+            program_node (gast.AST, optional): AST of the source to construct
+                the PDG from. Defaults to None (parse the source).
+
+        Returns:
+            ProgramDependenceGraph: the PDG of the function
+        """
+        key = hash_source(source)
+        pdg = self.get(key)
+        if pdg is not None:
+            self.hits += 1
+            return pdg
+
+        self.misses += 1
+        if program_node is None:
+            program_node = add_parent_info(program_to_ast(source))
+        pdg = construct_pdg(program_node)
+        self.put(key, pdg)
+        return pdg
+
+    def get(self, key: str) -> Optional[ProgramDependenceGraph]:
+        """Look up a PDG by key, in memory and then on disk."""
+        if key in self.pdgs:
+            self.pdgs.move_to_end(key)
+            return self.pdgs[key]
+
+        pdg = self.load(key)
+        if pdg is not None:
+            self.remember(key, pdg)
+        return pdg
+
+    def put(self, key: str, pdg: ProgramDependenceGraph):
+        """Cache a PDG in memory and (if enabled) on disk."""
+        self.remember(key, pdg)
+        self.store(key, pdg)
+
+    def remember(self, key: str, pdg: ProgramDependenceGraph):
+        self.pdgs[key] = pdg
+        self.pdgs.move_to_end(key)
+        while len(self.pdgs) > self.maxsize:
+            self.pdgs.popitem(last=False)
+
+    def clear(self):
+        """Drop the PDGs kept in memory (the on-disk tier is kept)."""
+        self.pdgs.clear()
+
+    ############ On-disk tier ############
+
+    def cache_file(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    def load(self, key: str) -> Optional[ProgramDependenceGraph]:
+        if self.cache_dir is None or not os.path.exists(self.cache_file(key)):
+            return None
+
+        try:
+            with open(self.cache_file(key), "rb") as file:
+                return pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            # a corrupt or partially written entry is a miss
+            return None
+
+    def store(self, key: str, pdg: ProgramDependenceGraph):
+        if self.cache_dir is None:
+            return
+
+        try:
+            data = pickle.dumps(pdg, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError, TypeError, AttributeError):
+            # e.g., very deeply nested functions; keep them in memory only
+            return
+
+        # write then rename so concurrent readers never see a partial entry
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_file = self.cache_file(key)
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as file:
+            file.write(data)
+        os.replace(temp_file, cache_file)
+
+
+# shared by the slicing pipeline (see `get_callsite_bc`)
+PDG_CACHE = PDGCache()
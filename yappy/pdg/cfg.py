@@ -6,7 +6,6 @@ arXiv preprint arXiv:2208.07461 (2022).
 """
 
 import itertools
-import uuid
 
 from absl import logging  # pylint: disable=unused-import
 import gast as ast
@@ -29,6 +28,39 @@ def get_control_flow_graph(program):
     return control_flow_visitor.graph
 
 
+def structural_hash(node, subtrees=None):
+    """Hash an AST such that ASTs representing the same program have equal hashes.
+
+    As in `instruction.represent_same_program`, `ctx` fields are ignored and Expr
+    nodes hash as their value. Lists hash by their items, so (unlike that
+    comparison, which only zips lists) a list never matches a shorter prefix.
+
+    Args:
+      node: An AST node, a list of AST nodes, or a primitive.
+      subtrees: If given, a list that (hash, AST node) pairs for every AST node in
+        `node` (as visited by `ast.walk`) are appended to.
+    Returns:
+      The hash of the node.
+    """
+    if isinstance(node, list):
+        return hash(tuple(structural_hash(item, subtrees) for item in node))
+    if not isinstance(node, ast.AST):
+        return hash((type(node), node))
+
+    if isinstance(node, ast.Expr):
+        node_hash = structural_hash(node.value, subtrees)
+    else:
+        items = [type(node)]
+        for field, value in ast.iter_fields(node):
+            if field != "ctx":
+                items.append((field, structural_hash(value, subtrees)))
+        node_hash = hash(tuple(items))
+
+    if subtrees is not None:
+        subtrees.append((node_hash, node))
+    return node_hash
+
+
 class ControlFlowGraph(object):
     """A control flow graph for a Python program.
 
@@ -36,24 +68,85 @@ class ControlFlowGraph(object):
       blocks: All blocks contained in the control flow graph.
       nodes: All control flow nodes in the control flow graph.
       start_block: The entry point to the program.
+      node_index: Maps from id(ast_node) to the control flow nodes whose
+        instruction is that AST node.
+      block_index: Maps from id(ast_node) to the blocks (in the graph) associated
+        with that AST node.
+        (Both indexes are rebuilt on the first lookup after unpickling.)
+      source_index: Maps from the structural hash of every AST subtree of every
+        instruction to the control flow nodes containing it, for source queries.
+        Built on the first query.
+      next_node_id: The id of the next ControlFlowNode created in the graph.
     """
 
     def __init__(self):
         self.blocks = []
         self.nodes = []
+        self.node_index = {}
+        self.block_index = {}
+        self.source_index = None
+        self.next_node_id = 0
 
         self.start_block = self.new_block(prunable=False)
         self.start_block.label = "<start>"
 
+    def __getstate__(self):
+        # the indexes are keyed by object ids, which do not survive pickling
+        state = self.__dict__.copy()
+        del state["node_index"], state["block_index"], state["source_index"]
+        return state
+
+    def __setstate__(self, state):
+        # the nodes and blocks may not be unpickled yet (e.g., when pickling a
+        # single block, which refers to its graph), so indexing is deferred
+        self.__dict__.update(state)
+        self.node_index, self.block_index, self.source_index = None, None, None
+
+    def build_ast_indexes(self):
+        """Indexes the control flow nodes and blocks by AST node."""
+        self.node_index, self.block_index = {}, {}
+        for control_flow_node in self.nodes:
+            self.index_node(control_flow_node)
+        for block in self.blocks:
+            self.index_block(block)
+
     def add_node(self, control_flow_node):
         self.nodes.append(control_flow_node)
+        self.index_node(control_flow_node)
+        self.source_index = None
+
+    def new_node_id(self):
+        node_id = self.next_node_id
+        self.next_node_id += 1
+        return node_id
+
+    def index_node(self, control_flow_node):
+        if self.node_index is None:
+            return  # indexed when the indexes are rebuilt
+        self.node_index.setdefault(id(control_flow_node.instruction.node), []).append(
+            control_flow_node
+        )
 
     def new_block(self, node=None, label=None, prunable=True):
         block = BasicBlock(node=node, label=label, prunable=prunable)
         block.graph = self
         self.blocks.append(block)
+        self.index_block(block)
         return block
 
+    def index_block(self, block):
+        if self.block_index is not None and block.node is not None:
+            self.block_index.setdefault(id(block.node), []).append(block)
+
+    def remove_block(self, block):
+        """Removes a (pruned or merged) block from the graph."""
+        self.blocks.remove(block)
+        if self.block_index is not None and block.node is not None:
+            blocks = self.block_index[id(block.node)]
+            blocks.remove(block)
+            if not blocks:
+                del self.block_index[id(block.node)]
+
     def move_block_to_rear(self, block):
         self.blocks.remove(block)
         self.blocks.append(block)
@@ -109,20 +202,21 @@ class ControlFlowGraph(object):
                 return first_block.label
 
     def get_control_flow_nodes_by_ast_node(self, node):
-        return six.moves.filter(
-            lambda control_flow_node: control_flow_node.instruction.node == node,
-            self.get_control_flow_nodes(),
-        )
+        if self.node_index is None:
+            self.build_ast_indexes()
+        return iter(self.node_index.get(id(node), ()))
 
     def get_control_flow_node_by_ast_node(self, node):
         return next(self.get_control_flow_nodes_by_ast_node(node))
 
     def get_blocks_by_ast_node(self, node):
-        for block in self.blocks:
-            for control_flow_node in block.control_flow_nodes:
-                if node == control_flow_node.instruction.node:
-                    yield block
-                    break
+        """Yields the blocks containing an instruction for `node`."""
+        # merging moves control flow nodes (and updates their block), and only
+        # empty blocks are pruned, so the nodes' blocks are always current
+        blocks = {}
+        for control_flow_node in self.get_control_flow_nodes_by_ast_node(node):
+            blocks[control_flow_node.block] = None
+        yield from blocks
 
     def get_block_by_ast_node(self, node):
         return next(self.get_blocks_by_ast_node(node))
@@ -136,16 +230,47 @@ class ControlFlowGraph(object):
     def get_block_by_function_name(self, name):
         return next(self.get_blocks_by_function_name(name))
 
+    def build_source_index(self):
+        """Indexes every subprogram of every instruction by its structural hash
+        (see `structural_hash`), with the control flow node containing it."""
+        self.source_index = {}
+        for control_flow_node in self.nodes:
+            instruction = control_flow_node.instruction
+            if instruction.source is not None:
+                # only the whole instruction matches (see `contains_subprogram`)
+                subtrees = [(structural_hash(instruction.node), instruction.node)]
+            else:
+                subtrees = []
+                structural_hash(instruction.node, subtrees)
+            for node_hash, subtree in subtrees:
+                self.source_index.setdefault(node_hash, []).append(
+                    (control_flow_node, subtree)
+                )
+
+    def get_control_flow_nodes_containing(self, node):
+        """Yields the control flow nodes whose instruction contains `node`."""
+        if self.source_index is None:
+            self.build_source_index()
+
+        last = None
+        for control_flow_node, subtree in self.source_index.get(
+            structural_hash(node), ()
+        ):
+            # hash collisions are ruled out by comparing the subprograms
+            if (
+                control_flow_node is not last
+                and instruction_module.represent_same_program(node, subtree)
+            ):
+                last = control_flow_node
+                yield control_flow_node
+
     def get_control_flow_nodes_by_source(self, source):
         module = ast.parse(source, mode="exec")  # TODO(dbieber): Factor out 4 lines
         node = module.body[0]
         if isinstance(node, ast.Expr):
             node = node.value
 
-        return six.moves.filter(
-            lambda cfn: cfn.instruction.contains_subprogram(node),
-            self.get_control_flow_nodes(),
-        )
+        return self.get_control_flow_nodes_containing(node)
 
     def get_control_flow_node_by_source(self, source):
         return next(self.get_control_flow_nodes_by_source(source))
@@ -162,34 +287,21 @@ class ControlFlowGraph(object):
 
     def get_blocks_by_source(self, source):
         """Yields blocks that contain instructions matching the query source."""
-        module = ast.parse(source, mode="exec")
-        node = module.body[0]
-        if isinstance(node, ast.Expr):
-            node = node.value
-
-        for block in self.blocks:
-            for control_flow_node in block.control_flow_nodes:
-                if control_flow_node.instruction.contains_subprogram(node):
-                    yield block
-                    break
+        blocks = {}
+        for control_flow_node in self.get_control_flow_nodes_by_source(source):
+            blocks[control_flow_node.block] = None
+        yield from blocks
 
     def get_block_by_source(self, source):
         return next(self.get_blocks_by_source(source))
 
     def get_blocks_by_source_and_ast_node_type(self, source, node_type):
         """Blocks with an Instruction matching node_type and containing source."""
-        module = ast.parse(source, mode="exec")
-        node = module.body[0]
-        if isinstance(node, ast.Expr):
-            node = node.value
-
-        for block in self.blocks:
-            for instruction in block.instructions:
-                if isinstance(
-                    instruction.node, node_type
-                ) and instruction.contains_subprogram(node):
-                    yield block
-                    break
+        blocks = {}
+        for control_flow_node in self.get_control_flow_nodes_by_source(source):
+            if isinstance(control_flow_node.instruction.node, node_type):
+                blocks[control_flow_node.block] = None
+        yield from blocks
 
     def get_block_by_source_and_ast_node_type(self, source, node_type):
         """A block with an Instruction matching node_type and containing source."""
@@ -197,8 +309,10 @@ class ControlFlowGraph(object):
 
     def get_block_by_ast_node_and_label(self, node, label):
         """Gets the block corresponding to `node` having label `label`."""
-        for block in self.blocks:
-            if block.node is node and block.label == label:
+        if self.block_index is None:
+            self.build_ast_indexes()
+        for block in self.block_index.get(id(node), ()):
+            if block.label == label:
                 return block
 
     def get_blocks_by_ast_node_type_and_label(self, node_type, label):
@@ -219,7 +333,7 @@ class ControlFlowGraph(object):
             for block in iter(self.blocks):
                 if block.can_prune():
                     to_remove = block.prune()
-                    self.blocks.remove(to_remove)
+                    self.remove_block(to_remove)
                     progress = True
 
     def compact(self):
@@ -228,7 +342,7 @@ class ControlFlowGraph(object):
         for block in iter(self.blocks):
             while block.can_merge():
                 to_remove = block.merge()
-                self.blocks.remove(to_remove)
+                self.remove_block(to_remove)
         for block in self.blocks:
             block.compact()
 
@@ -277,9 +391,6 @@ class BasicBlock(object):
         block in a Python program.
       control_flow_nodes: A list of the ControlFlowNodes contained in this basic
         block. Each ControlFlowNode corresponds to a single Instruction.
-      control_flow_node_indexes: Maps from id(control_flow_node) to the
-        ControlFlowNode's index in self.control_flow_nodes. Only available once
-        the block is compacted.
 
       branches: A map from booleans to the basic block reachable by making the
         branch decision indicated by that boolean.
@@ -304,7 +415,6 @@ class BasicBlock(object):
         self.next = set()
         self.prev = set()
         self.control_flow_nodes = []
-        self.control_flow_node_indexes = None
 
         self.branches = {}
         self.except_branches = {}
@@ -468,6 +578,7 @@ class BasicBlock(object):
                 self.add_exit(block, interrupting=False)
         for control_flow_node in next_block.control_flow_nodes:
             control_flow_node.block = self
+            control_flow_node.index = len(self.control_flow_nodes)
             self.control_flow_nodes.append(control_flow_node)
         self.prunable = self.prunable and next_block.prunable
         self.label = self.label or next_block.label
@@ -480,17 +591,18 @@ class BasicBlock(object):
         control_flow_node = ControlFlowNode(
             graph=self.graph, block=self, instruction=instruction
         )
+        control_flow_node.index = len(self.control_flow_nodes)
         self.graph.add_node(control_flow_node)
         self.control_flow_nodes.append(control_flow_node)
 
     def compact(self):
-        self.control_flow_node_indexes = {}
         for index, control_flow_node in enumerate(self.control_flow_nodes):
-            self.control_flow_node_indexes[control_flow_node.uuid] = index
+            control_flow_node.index = index
 
     def index_of(self, control_flow_node):
         """Returns the index of the Instruction in this BasicBlock."""
-        return self.control_flow_node_indexes[control_flow_node.uuid]
+        assert control_flow_node.block is self
+        return control_flow_node.index
 
 
 class ControlFlowNode(object):
@@ -504,7 +616,8 @@ class ControlFlowNode(object):
       instruction: The Instruction corresponding to this node.
       labels: Metadata attached to this node, for example for use by data flow
         analyses.
-      uuid: A unique identifier for the ControlFlowNode.
+      id: An identifier for the ControlFlowNode, unique within its graph.
+      index: The index of the ControlFlowNode in its block's control_flow_nodes.
     """
 
     def __init__(self, graph, block, instruction):
@@ -512,7 +625,8 @@ class ControlFlowNode(object):
         self.block = block
         self.instruction = instruction
         self.labels = {}
-        self.uuid = uuid.uuid4()
+        self.id = graph.new_node_id()
+        self.index = None
 
     @property
     def next(self):
@@ -522,7 +636,7 @@ class ControlFlowNode(object):
         """
         if self.block is None:
             return None
-        index_in_block = self.block.index_of(self)
+        index_in_block = self.index
         if len(self.block.control_flow_nodes) > index_in_block + 1:
             return {self.block.control_flow_nodes[index_in_block + 1]}
         control_flow_nodes = set()
@@ -544,7 +658,7 @@ class ControlFlowNode(object):
         """
         if self.block is None:
             return None
-        index_in_block = self.block.index_of(self)
+        index_in_block = self.index
         if len(self.block.control_flow_nodes) > index_in_block + 1:
             return {self.block.control_flow_nodes[index_in_block + 1]}
         control_flow_nodes = set()
@@ -564,7 +678,7 @@ class ControlFlowNode(object):
         """Returns the set of possible previous instructions."""
         if self.block is None:
             return None
-        index_in_block = self.block.index_of(self)
+        index_in_block = self.index
         if index_in_block - 1 >= 0:
             return {self.block.control_flow_nodes[index_in_block - 1]}
         control_flow_nodes = set()
@@ -609,7 +723,7 @@ class ControlFlowNode(object):
         """
         if self.block is None:
             return {}  # We're not in a block. No branch decision.
-        index_in_block = self.block.index_of(self)
+        index_in_block = self.index
         if len(self.block.control_flow_nodes) > index_in_block + 1:
             return {}  # We're not yet at the end of the block. No branch decision.
 
@@ -629,9 +743,7 @@ class ControlFlowNode(object):
                 # is nonempty. This is guaranteed by the pruning phase of control flow
                 # graph construction.
                 assert not next_block.next
-                branches[
-                    key
-                ] = (
+                branches[key] = (
                     next_block.label
                 )  # Indicates exit or raise; there is no node to return.
         return branches
@@ -1,6 +1,9 @@
+import os
+import uuid
 import collections
 import gast as ast
 import textwrap
+from typing import Optional
 
 from python_graphs import instruction as instruction_module
 from python_graphs.program_utils import program_to_ast
@@ -15,8 +18,7 @@ import python_graphs.program_graph_dataclasses as pb
 
 from yappy.pdg.utils import (
     PDGEdgeType,
-    post_dominators,
-    immediate_post_dominator,
+    PostDominatorTree,
     cfgnode2code,
 )
 
@@ -57,18 +59,48 @@ class ProgramDependenceGraph(ProgramGraph):
     def __init__(self, cfg, var_def_use_analysis, reaching_def_analysis):
         super(ProgramDependenceGraph, self).__init__()
         self.cfg = cfg
-        self.pdom = post_dominators(cfg)
-        self.ipdom = immediate_post_dominator(self.pdom)
+        self.pdom_tree = PostDominatorTree(cfg)
+        self.ipdom = self.pdom_tree.ipdom
 
         self.var_def_use_analysis = var_def_use_analysis
         self.reaching_def_analysis = reaching_def_analysis
 
+        self.cfg_to_pdg_nodes = {}
         for control_flow_node in cfg.get_control_flow_nodes():
-            self.add_node_from_instruction(control_flow_node.instruction)
+            self.cfg_to_pdg_nodes[control_flow_node] = self.add_node_from_instruction(
+                control_flow_node.instruction
+            )
 
         for node in self.nodes.values():
             self.add_data_dependence_edges(node)
-            self.add_control_dependence_edges(node)
+        self.add_control_dependence_edges()
+
+    def __getstate__(self):
+        # parent_map defaults to None through a lambda, which cannot be pickled
+        state = self.__dict__.copy()
+        state["parent_map"] = dict(self.parent_map)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.parent_map = collections.defaultdict(lambda: None, self.parent_map)
+        # AST nodes are indexed by object id, which changes when unpickled
+        self.ast_id_to_program_graph_node = {
+            id(node.ast_node): node
+            for node in self.nodes.values()
+            if node.ast_node is not None
+        }
+
+    def get_nodes_by_source(self, source):
+        """Generates the nodes in the PDG containing the query source.
+
+        Every node has an instruction, so this looks up the control flow nodes
+        through the CFG's source index instead of scanning all nodes.
+        """
+        return map(
+            self.cfg_to_pdg_nodes.__getitem__,
+            self.cfg.get_control_flow_nodes_by_source(source),
+        )
 
     def add_data_dependence_edges(self, nodeB):
         """Add data dependence edges for a node B.
@@ -88,55 +120,55 @@ class ProgramDependenceGraph(ProgramGraph):
                     # print(f"DD: {cfgnode2code(defn[1])} --> {cfgnode2code(cfg_nodeB)}")
                     self.add_new_edge(nodeB.id, nodeA.id, edge_type=PDGEdgeType.DD)
 
-    def add_control_dependence_edges(self, nodeA):
-        """Add control dependence edges from nodes to node A.
+    def add_control_dependence_edges(self):
+        """Add control dependence edges for all nodes.
 
         node C is control dependent on node A
-        if there is a path from A to C in the CFG such that
-        it does not contain the immediate post-dominator of A.
+        if A is in the post-dominance frontier of C, i.e., C post-dominates a
+        successor of A but does not strictly post-dominate A.
+
+        The frontiers are computed in one pass: from every successor of each
+        branch A, walk up the post-dominator tree until A's immediate
+        post-dominator (None for the virtual exit); every node on the way is
+        control dependent on A. The cost is proportional to the number of
+        edges added.
         """
+        ipdom = self.pdom_tree.ipdom
 
-        cfg_nodeA = self.cfg.get_control_flow_node_by_ast_node(nodeA.ast_node)
-
-        # for every B that A has an edge to
-        for cfg_nodeB in cfg_nodeA.next:
-            # s.t. node A is not post dominated by node B
-            if cfg_nodeB in self.pdom[cfg_nodeA]:
+        for cfg_nodeA, nodeA in self.cfg_to_pdg_nodes.items():
+            successors = cfg_nodeA.next
+            # a single successor post-dominates A
+            if len(successors) < 2:
                 continue
 
-            # @manish: a node could have no post dominators
-            # e.g., ... if <c>: return ...
-            # in this case, we skip the node
-            if cfg_nodeA not in self.ipdom:
-                continue
+            ipdom_nodeA = ipdom.get(cfg_nodeA)
+            for current in successors:
+                while current is not None and current is not ipdom_nodeA:
+                    nodeC = self.cfg_to_pdg_nodes[current]
 
-            # move up from B in the post-dominator tree until A's ipdom
+                    # add the control dependence edge if not to itself
+                    if nodeC.id != nodeA.id:
+                        self.add_new_edge(nodeC.id, nodeA.id, edge_type=PDGEdgeType.CD)
 
-            ipdom_nodeA = self.ipdom[cfg_nodeA]
-            current = cfg_nodeB
+                    # move up the post-dominator tree
+                    current = ipdom.get(current)
 
-            while current != ipdom_nodeA:
-                # every node on this path is control dependent on A
-                nodeC = self.get_node_by_ast_node(current.instruction.node)
 
-                # add the control dependence edge if not to itself
-                if nodeC.id != nodeA.id:
-                    # print(f"CD: {cfgnode2code(cfg_nodeA)} --> {cfgnode2code(current)}")
-                    self.add_new_edge(nodeC.id, nodeA.id, edge_type=PDGEdgeType.CD)
+def construct_pdg(program_node, render_to: Optional[str] = None):
+    """Construct the Program Dependence Graph from an AST.
 
-                # move up the post-dominator tree
-                current = self.ipdom[current]
+    Args:
+        program_node (gast.AST): the AST of the program
+        render_to (str, optional): directory to render the CFG and PDG into (for
+            debugging), as uniquely named `<name>-<id>-cfg.png` and
+            `<name>-<id>-pdg.png` files. Defaults to None (no rendering).
 
-
-def construct_pdg(program_node):
-    """Construct the Program Dependence Graph from an AST."""
+    Returns:
+        ProgramDependenceGraph: the PDG of the program
+    """
 
     # Construct the control flow graph
     cfg = control_flow.get_control_flow_graph(program_node)
-    try:
-        render_cfg(cfg, path="cfg.png")
-    except:
-        pass
 
     # Perform the analyses
     def_use_analysis = VariableDefUseAnalysis()  # NOTE: Works perfectly!
@@ -150,14 +182,25 @@ def construct_pdg(program_node):
 
     # Construct the data dependence graph
     pdg = ProgramDependenceGraph(cfg, def_use_analysis, reaching_def_analysis)
-    try:
-        render_pg(pdg, path="pdg.png")
-    except:
-        pass
+
+    if render_to is not None:
+        render_graphs(program_node, cfg, pdg, render_to)
 
     return pdg
 
 
+def render_graphs(program_node, cfg, pdg, directory: str):
+    """Render the CFG and PDG of a program into a directory, with file names
+    unique to this call (so concurrent builds do not overwrite each other)."""
+    body = getattr(program_node, "body", None)
+    name = getattr(body[0], "name", "program") if body else "program"
+    prefix = os.path.join(directory, f"{name}-{uuid.uuid4().hex[:8]}")
+
+    os.makedirs(directory, exist_ok=True)
+    render_cfg(cfg, path=f"{prefix}-cfg.png")
+    render_pg(pdg, path=f"{prefix}-pdg.png")
+
+
 ############ Test ############
 
 if __name__ == "__main__":
@@ -176,4 +219,4 @@ if __name__ == "__main__":
     """
 
     program_node = program_to_ast(code)
-    pdg = construct_pdg(program_node)
+    pdg = construct_pdg(program_node, render_to=".")
@@ -72,6 +72,113 @@ def immediate_post_dominator(pdom):
     return ipdom
 
 
+class PostDominatorTree:
+    """The post-dominator tree of a control flow graph.
+
+    Built with the Cooper-Harvey-Kennedy algorithm ("A Simple, Fast Dominance
+    Algorithm") on the reverse CFG, whose root is a virtual exit node that
+    succeeds all exit nodes. Nodes that cannot reach an exit are not in the tree.
+
+    Attributes:
+        ipdom: a dictionary mapping a node to its immediate post-dominator; nodes
+            immediately post-dominated by the virtual exit (e.g., exit nodes, or
+            nodes branching to different exits) have no entry, as in
+            `immediate_post_dominator`.
+    """
+
+    def __init__(self, cfg):
+        nodes = list(cfg.get_control_flow_nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        exit = len(nodes)  # the virtual exit
+
+        # successors in the CFG are predecessors in the reverse CFG
+        succs = [[index[succ] for succ in node.next] for node in nodes]
+        succs.append([])
+        preds = [[] for _ in range(exit + 1)]
+        for i, node_succs in enumerate(succs[:exit]):
+            if not node_succs:
+                node_succs.append(exit)
+            for j in node_succs:
+                preds[j].append(i)
+
+        # postorder of the reverse CFG from the virtual exit
+        order = [-1] * (exit + 1)
+        postorder = []
+        visited = [False] * (exit + 1)
+        visited[exit] = True
+        stack = [(exit, iter(preds[exit]))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if not visited[child]:
+                    visited[child] = True
+                    stack.append((child, iter(preds[child])))
+                    break
+            else:
+                stack.pop()
+                order[node] = len(postorder)
+                postorder.append(node)
+
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while order[a] < order[b]:
+                    a = idom[a]
+                while order[b] < order[a]:
+                    b = idom[b]
+            return a
+
+        idom = [None] * (exit + 1)
+        idom[exit] = exit
+        changed = True
+        while changed:
+            changed = False
+            for node in reversed(postorder[:-1]):
+                new_idom = None
+                for succ in succs[node]:
+                    if idom[succ] is not None:
+                        new_idom = (
+                            succ if new_idom is None else intersect(succ, new_idom)
+                        )
+                if idom[node] != new_idom:
+                    idom[node] = new_idom
+                    changed = True
+
+        self.ipdom = {
+            nodes[i]: nodes[idom[i]]
+            for i in range(exit)
+            if idom[i] is not None and idom[i] != exit
+        }
+
+        # pre/post numbering of the tree for constant-time dominance queries
+        children = [[] for _ in range(exit + 1)]
+        for i in range(exit):
+            if idom[i] is not None:
+                children[idom[i]].append(i)
+
+        self._pre, self._post = {}, {}
+        counter = 0
+        stack = [(exit, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                self._post[node] = counter
+            else:
+                self._pre[node] = counter
+                stack.append((node, True))
+                stack.extend((child, False) for child in children[node])
+            counter += 1
+
+        self._index = index
+
+    def post_dominates(self, u, v) -> bool:
+        """Whether node u post-dominates node v (every node post-dominates
+        itself)."""
+        i, j = self._index[u], self._index[v]
+        if i not in self._pre or j not in self._pre:
+            return u is v
+        return self._pre[i] <= self._pre[j] and self._post[j] <= self._post[i]
+
+
 def print_pdom(pdom):
     print("=== Post Dominators === ")
     for node in pdom:
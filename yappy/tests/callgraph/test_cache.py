@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from yappy.callgraph import pycg
+from yappy.callgraph.cache import hash_repo
+
+
+class TestCallGraphCache(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.temp_dir, "repo")
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        os.mkdir(self.repo_path)
+
+        with open(os.path.join(self.repo_path, "module1.py"), "w") as f:
+            f.write("def func1(): pass\n")
+            f.write("def func2(): func1()\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_hash_repo(self):
+        key = hash_repo(self.repo_path, "0.0.7", -1)
+        self.assertEqual(key, hash_repo(self.repo_path, "0.0.7", -1))
+        self.assertNotEqual(key, hash_repo(self.repo_path, "0.0.7", 2))
+
+        with open(os.path.join(self.repo_path, "module1.py"), "a") as f:
+            f.write("def func3(): pass\n")
+        self.assertNotEqual(key, hash_repo(self.repo_path, "0.0.7", -1))
+
+    def test_cache_hit_skips_pycg(self):
+        result = pycg.construct_cg(self.repo_path, cache_dir=self.cache_dir)
+        self.assertIn("module1.func1", result[0]["module1.func2"])
+
+        with mock.patch.object(pycg, "CallGraphGenerator") as generator:
+            cached = pycg.construct_cg(self.repo_path, cache_dir=self.cache_dir)
+            generator.assert_not_called()
+
+        self.assertEqual(tuple(cached), tuple(result))
+
+    def test_sanity_modes(self):
+        _, _, skipped = pycg.construct_cg(
+            self.repo_path, cache_dir=self.cache_dir, sanity=pycg.SanityMode.SKIP
+        )
+        self.assertIsNone(skipped)
+
+        # the cached entry has no sanity checks; they are computed on a hit
+        with mock.patch.object(pycg, "CallGraphGenerator") as generator:
+            _, _, lazy = pycg.construct_cg(
+                self.repo_path, cache_dir=self.cache_dir, sanity=pycg.SanityMode.LAZY
+            )
+            _, _, eager = pycg.construct_cg(self.repo_path, cache_dir=self.cache_dir)
+            generator.assert_not_called()
+
+        self.assertIsInstance(lazy, pycg.LazySanityChecks)
+        self.assertEqual(dict(lazy), eager)
+        self.assertEqual(eager["module1.func2"]["callcount"], 1)
+
+    def test_sanity_checks_refer_to_repo(self):
+        _, _, lazy = pycg.construct_cg(
+            self.repo_path, cache_dir=self.cache_dir, sanity=pycg.SanityMode.LAZY
+        )
+        _, _, miss = pycg.construct_cg(self.repo_path, overlay=True)
+        _, _, hit = pycg.construct_cg(self.repo_path, cache_dir=self.cache_dir)
+
+        # the lazy checks outlive the fixed copy, which the runs above replaced
+        self.assertEqual(dict(lazy), miss)
+        self.assertEqual(hit, miss)
+        self.assertEqual(
+            miss["module1.func2"]["file"], os.path.join(self.repo_path, "module1.py")
+        )
@@ -0,0 +1,64 @@
+from unittest import TestCase
+
+from yappy.callgraph.pycg import RepoCallGraph
+from yappy.callgraph.callchains import MAX_CHAINS, iter_call_chains
+from yappy.backwardslice.utils import get_call_chains
+
+# main -> a -> target, main -> b -> target, b <-> c (cycle)
+PYCG_DICT = {
+    "mod.main": ["mod.a", "mod.b"],
+    "mod.a": ["mod.target"],
+    "mod.b": ["mod.target", "mod.c"],
+    "mod.c": ["mod.b"],
+}
+
+
+class TestCallChains(TestCase):
+    def setUp(self):
+        self.repo_cg = RepoCallGraph("/nonexistent", PYCG_DICT)
+        self.target = self.repo_cg.intern("mod.target")
+
+    def chains(self, **limits):
+        return [
+            [entity.id for entity in chain]
+            for chain in iter_call_chains(self.repo_cg, self.target, **limits)
+        ]
+
+    def test_all_chains(self):
+        self.assertCountEqual(
+            self.chains(),
+            [
+                ["mod.target", "mod.a", "mod.main"],
+                ["mod.target", "mod.b", "mod.main"],
+                ["mod.target", "mod.b", "mod.c"],
+            ],
+        )
+
+    def test_limits(self):
+        self.assertEqual(len(self.chains(max_chains=2)), 2)
+        self.assertCountEqual(
+            self.chains(max_depth=1), [["mod.target", "mod.a"], ["mod.target", "mod.b"]]
+        )
+
+    def test_deep_chain(self):
+        depth = 5000
+        pycg_dict = {f"mod.f{i + 1}": [f"mod.f{i}"] for i in range(depth)}
+        repo_cg = RepoCallGraph("/nonexistent", pycg_dict)
+
+        (chain,) = iter_call_chains(repo_cg, repo_cg.intern("mod.f0"))
+        self.assertEqual(len(chain), depth + 1)
+
+    def test_bounded_defaults(self):
+        # a ladder with two callers per level has 2^30 chains
+        levels = 30
+        pycg_dict = {}
+        for i in range(levels):
+            for side in "ab":
+                pycg_dict[f"mod.{side}{i + 1}"] = [f"mod.a{i}", f"mod.b{i}"]
+        repo_cg = RepoCallGraph("/nonexistent", pycg_dict)
+
+        chains = get_call_chains(repo_cg.intern("mod.a0"), repo_cg)
+        self.assertEqual(len(chains), MAX_CHAINS)
+        self.assertEqual(
+            len(get_call_chains(repo_cg.intern("mod.a0"), repo_cg, max_depth=3)), 8
+        )
@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from yappy.callgraph.pycg import RepoCallGraph, construct_cg, update_cg
+
+
+class TestIncrementalCallGraph(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.temp_dir, "repo")
+        os.mkdir(self.repo_path)
+
+        self.write("util.py", "def helper(): pass\ndef other(): pass\n")
+        self.write("main.py", "from util import helper\ndef main(): helper()\n")
+        self.write("unrelated.py", "def alone(): print(1)\n")
+
+        cg, _, _ = construct_cg(self.repo_path)
+        self.repo_cg = RepoCallGraph(self.repo_path, cg)
+        self.repo_cg.track_modules()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name, code):
+        with open(os.path.join(self.repo_path, name), "w") as f:
+            f.write(code)
+
+    def test_no_changes(self):
+        self.assertEqual(update_cg(self.repo_cg), set())
+
+    def test_update_matches_full_rebuild(self):
+        self.write("util.py", "def helper(): other()\ndef other(): pass\n")
+        self.write("main.py", "from util import other\ndef main(): other()\n")
+
+        affected = update_cg(self.repo_cg)
+        self.assertEqual(affected, {"util", "main"})
+
+        cg, _, _ = construct_cg(self.repo_path)
+        expected = RepoCallGraph(self.repo_path, cg)
+
+        self.assertEqual(self.repo_cg.as_dict(), expected.as_dict())
+        self.assertEqual(
+            {
+                k.id: sorted(c.id for c in v)
+                for k, v in self.repo_cg.inv_call_graph.items()
+            },
+            {k.id: sorted(c.id for c in v) for k, v in expected.inv_call_graph.items()},
+        )
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from yappy.callgraph import imports
+from yappy.callgraph.imports import ModuleMemberIndex, get_all_module_members
+
+
+class TestModuleMembers(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.module_path = os.path.join(self.temp_dir, "module1.py")
+        with open(self.module_path, "w") as f:
+            f.write("from os import path\n")
+            f.write("_private = 1\n")
+            f.write("CONSTANT = 2\n")
+            f.write("def func1():\n    def nested(): pass\n")
+            f.write("class Class1:\n    def method(self): pass\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_public_top_level_members(self):
+        self.assertEqual(
+            get_all_module_members(self.module_path),
+            ["path", "CONSTANT", "func1", "Class1"],
+        )
+
+    def test_dunder_all(self):
+        with open(self.module_path, "a") as f:
+            f.write("__all__ = ['func1']\n__all__ += ['Class1']\n")
+        self.assertEqual(get_all_module_members(self.module_path), ["func1", "Class1"])
+
+    def test_index_parses_once(self):
+        index = ModuleMemberIndex()
+        with mock.patch.object(
+            imports, "get_all_module_members", wraps=get_all_module_members
+        ) as members:
+            index.get(self.module_path)
+            index.get(self.module_path)
+            members.assert_called_once()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from yappy.callgraph.imports import fix_repo_imports
+
+
+class TestImportOverlay(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.temp_dir, "repo")
+        package = os.path.join(self.repo_path, "pkg")
+        os.makedirs(package)
+
+        with open(os.path.join(package, "__init__.py"), "w") as f:
+            f.write("")
+        with open(os.path.join(package, "module1.py"), "w") as f:
+            f.write("def func1(): pass\n")
+        with open(os.path.join(package, "module2.py"), "w") as f:
+            f.write("from .module1 import *\n")
+        with open(os.path.join(self.repo_path, "data.txt"), "w") as f:
+            f.write("not python\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_overlay(self):
+        overlay_path = fix_repo_imports(self.repo_path, overlay=True)
+        package = os.path.join(overlay_path, "pkg")
+
+        # only python files are mirrored
+        self.assertFalse(os.path.exists(os.path.join(overlay_path, "data.txt")))
+
+        # files without fixable imports are linked, not rewritten
+        self.assertTrue(os.path.islink(os.path.join(package, "module1.py")))
+
+        with open(os.path.join(package, "module2.py"), "r") as f:
+            self.assertIn("from pkg.module1 import func1", f.read())
+
+        # the original repository is untouched
+        with open(os.path.join(self.repo_path, "pkg", "module2.py"), "r") as f:
+            self.assertEqual(f.read(), "from .module1 import *\n")
+
+    def test_parallel_fixes(self):
+        for overlay in (False, True):
+            fixed_path = fix_repo_imports(self.repo_path, overlay=overlay, workers=2)
+            with open(os.path.join(fixed_path, "pkg", "module2.py"), "r") as f:
+                self.assertIn("from pkg.module1 import func1", f.read())
+
+    def test_reexport_chain(self):
+        package = os.path.join(self.repo_path, "chain")
+        os.makedirs(package)
+        with open(os.path.join(package, "__init__.py"), "w") as f:
+            f.write("")
+        with open(os.path.join(package, "m0.py"), "w") as f:
+            f.write("def f0(): pass\n")
+        for i in range(1, 20):
+            with open(os.path.join(package, f"m{i}.py"), "w") as f:
+                f.write(f"from .m{i - 1} import *\ndef f{i}(): pass\n")
+
+        # imports resolve against the original files, whatever the order in
+        # which (or the process by which) the files are fixed
+        outputs = []
+        for overlay, workers in ((False, None), (False, 4), (True, None), (True, 4)):
+            fixed_path = fix_repo_imports(
+                self.repo_path, overlay=overlay, workers=workers
+            )
+            output = {}
+            for i in range(20):
+                with open(os.path.join(fixed_path, "chain", f"m{i}.py"), "r") as f:
+                    output[i] = f.read()
+            outputs.append(output)
+
+        for output in outputs[1:]:
+            self.assertEqual(output, outputs[0])
+        self.assertIn("from chain.m1 import f1\n", outputs[0][2])
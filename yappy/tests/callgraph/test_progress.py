@@ -0,0 +1,87 @@
+import os
+import time
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from yappy.callgraph import pycg
+from yappy.callgraph.pycg import AnalysisPhase, construct_cg, run_pycg
+
+
+class TestAnalysisProgress(TestCase):
+    def setUp(self):
+        self.repo_path = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.repo_path, "module1.py")
+        with open(self.file_path, "w") as f:
+            f.write("def func1(): pass\n")
+            f.write("def func2(): return func1\n")
+            f.write("def func3(): func2()()\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_path)
+
+    def test_progress_events(self):
+        events = []
+        cgraph, timed_out = run_pycg(
+            [self.file_path], self.repo_path, progress=events.append
+        )
+
+        phases = [event.phase for event in events]
+        self.assertEqual(phases[0], AnalysisPhase.PREPROCESSING)
+        self.assertEqual(phases[-1], AnalysisPhase.CALL_GRAPH)
+        self.assertGreater(phases.count(AnalysisPhase.ITERATION), 0)
+        self.assertEqual(
+            events[-1].edges, sum(len(callees) for callees in cgraph.values())
+        )
+        self.assertFalse(events[-1].timed_out)
+        self.assertFalse(timed_out)
+        self.assertIn("module1.func1", cgraph["module1.func3"])
+
+    def test_timeout_returns_partial_graph(self):
+        events = []
+        cgraph, timed_out = run_pycg(
+            [self.file_path], self.repo_path, timeout=0, progress=events.append
+        )
+
+        self.assertTrue(timed_out)
+        self.assertTrue(events[-1].timed_out)
+        self.assertEqual(events[-1].iteration, 0)
+        self.assertNotIn(AnalysisPhase.ITERATION, [event.phase for event in events])
+        self.assertIn("module1.func2", cgraph["module1.func3"])
+
+    def test_partial_call_graphs_are_not_cached(self):
+        cache_dir = self.repo_path + "_cache"
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.repo_path + "_temp", ignore_errors=True)
+
+        *_, partial = construct_cg(
+            self.repo_path, cache_dir=cache_dir, timeout=0, return_partial=True
+        )
+        self.assertTrue(partial)
+        self.assertFalse(os.path.exists(cache_dir))
+
+    def test_budget_excludes_import_fixing(self):
+        cache_dir = self.repo_path + "_cache"
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.repo_path + "_temp", ignore_errors=True)
+
+        # import fixing takes longer than the budget, the PyCG run does not
+        fix_repo_imports = pycg.fix_repo_imports
+
+        def slow_fix_repo_imports(*args, **kwargs):
+            time.sleep(0.2)
+            return fix_repo_imports(*args, **kwargs)
+
+        with mock.patch.object(pycg, "fix_repo_imports", slow_fix_repo_imports):
+            *_, partial = construct_cg(
+                self.repo_path, cache_dir=cache_dir, timeout=0.1, return_partial=True
+            )
+        self.assertFalse(partial)
+
+        with mock.patch.object(pycg, "CallGraphGenerator") as generator:
+            cgraph, _, _, partial = construct_cg(
+                self.repo_path, cache_dir=cache_dir, return_partial=True
+            )
+            generator.assert_not_called()
+        self.assertFalse(partial)
+        self.assertIn("module1.func2", cgraph["module1.func3"])
@@ -0,0 +1,74 @@
+import random
+from unittest import TestCase
+
+from yappy.callgraph.pycg import RepoCallGraph
+from yappy.callgraph.reachability import (
+    ReachabilityIndex,
+    strongly_connected_components,
+)
+
+
+def random_pycg_dict(num_functions, num_calls, seed):
+    rng = random.Random(seed)
+    pycg_dict = {f"mod.f{i}": [] for i in range(num_functions)}
+    for _ in range(num_calls):
+        caller, callee = rng.randrange(num_functions), rng.randrange(num_functions)
+        pycg_dict[f"mod.f{caller}"].append(f"mod.f{callee}")
+    return pycg_dict
+
+
+class TestReachabilityIndex(TestCase):
+    def test_strongly_connected_components(self):
+        # 0 -> 1 -> 2 -> 0, 2 -> 3, 3 -> 3
+        components = strongly_connected_components([[1], [2], [0, 3], [3]])
+        self.assertEqual([sorted(c) for c in components], [[3], [0, 1, 2]])
+
+    def test_matches_graph_search(self):
+        for seed in range(5):
+            repo_cg = RepoCallGraph("/nonexistent", random_pycg_dict(40, 60, seed))
+            index = repo_cg.reachability()
+            self.assertIs(index, repo_cg.reachability())
+
+            for entity in index.entities.values():
+                # callers found by searching the inverse call graph
+                callers, stack = set(), [entity]
+                while stack:
+                    for caller in repo_cg.inv_call_graph.get(stack.pop(), []):
+                        if caller not in callers:
+                            callers.add(caller)
+                            stack.append(caller)
+
+                self.assertEqual(index.transitive_callers(entity), callers)
+                for caller in callers:
+                    self.assertTrue(index.can_reach(caller, entity))
+                self.assertEqual(
+                    index.entry_points(entity),
+                    {c for c in callers if not repo_cg.inv_call_graph.get(c)},
+                )
+
+    def test_search_without_bitsets(self):
+        for seed in range(5):
+            repo_cg = RepoCallGraph("/nonexistent", random_pycg_dict(40, 60, seed))
+            index = repo_cg.reachability()
+            searched = ReachabilityIndex(repo_cg.call_graph, max_components=0)
+            self.assertFalse(searched.bitsets)
+            self.assertEqual(searched.descendants, [])
+
+            entities = list(index.entities.values())
+            for entity in entities:
+                self.assertEqual(
+                    searched.transitive_callers(entity),
+                    index.transitive_callers(entity),
+                )
+                self.assertEqual(
+                    searched.transitive_callees(entity),
+                    index.transitive_callees(entity),
+                )
+                self.assertEqual(
+                    searched.entry_points(entity), index.entry_points(entity)
+                )
+                for other in entities:
+                    self.assertEqual(
+                        searched.can_reach(entity, other),
+                        index.can_reach(entity, other),
+                    )
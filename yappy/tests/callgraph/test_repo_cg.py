@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from yappy.callgraph import pycg
+from yappy.callgraph.pycg import CalleeType, RepoCallGraph
+from yappy.callgraph.csr import CompactCallGraph
+
+PYCG_DICT = {
+    "pkg.mod.caller": ["pkg.mod.local", "pkg.util.Class.method", "<builtin>.len"],
+    "pkg.util.Class.method": ["requests.get", "pkg.mod.local"],
+}
+
+
+class TestRepoCallGraph(TestCase):
+    def setUp(self):
+        self.repo_path = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.repo_path, "pkg"))
+        for module in ("__init__", "mod", "util"):
+            with open(os.path.join(self.repo_path, "pkg", module + ".py"), "w") as f:
+                f.write("")
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_path)
+
+    def test_callee_types(self):
+        repo_cg = RepoCallGraph(self.repo_path, PYCG_DICT)
+        types = {
+            (caller.id, callee.id): callee.type
+            for caller, callees in repo_cg
+            for callee in callees
+        }
+        self.assertEqual(
+            types,
+            {
+                ("pkg.mod.caller", "pkg.mod.local"): CalleeType.LOCAL,
+                ("pkg.mod.caller", "pkg.util.Class.method"): CalleeType.EXTERNAL,
+                ("pkg.mod.caller", "<builtin>.len"): CalleeType.BUILTIN,
+                ("pkg.util.Class.method", "requests.get"): CalleeType.API,
+                ("pkg.util.Class.method", "pkg.mod.local"): CalleeType.EXTERNAL,
+            },
+        )
+
+    def test_module_resolution_without_io(self):
+        # the repo is walked once; entities are resolved against its modules
+        with mock.patch.object(pycg.os.path, "exists", side_effect=AssertionError):
+            repo_cg = RepoCallGraph(self.repo_path, PYCG_DICT)
+
+        method = next(c for c in repo_cg.inv_call_graph if c.id.endswith("method"))
+        self.assertEqual(method.module.name, "pkg.util")
+        self.assertTrue(method.exists())
+
+    def test_modules_reflect_repo(self):
+        pycg_dict = {"pkg.mod.caller": ["pkg.new.func"]}
+        repo_cg = RepoCallGraph(self.repo_path, pycg_dict)
+        callees = [callee for _, callees in repo_cg for callee in callees]
+        self.assertEqual([c.type for c in callees], [CalleeType.API])
+
+        with open(os.path.join(self.repo_path, "pkg", "new.py"), "w") as f:
+            f.write("def func(): pass\n")
+
+        # a new graph sees the new module; an existing one after a refresh
+        fresh_cg = RepoCallGraph(self.repo_path, pycg_dict)
+        callees = [callee for _, callees in fresh_cg for callee in callees]
+        self.assertEqual([c.type for c in callees], [CalleeType.EXTERNAL])
+        repo_cg.refresh_modules()
+        self.assertTrue(repo_cg.intern("pkg.new.func").exists())
+
+    def test_interned_entities(self):
+        repo_cg = RepoCallGraph(self.repo_path, PYCG_DICT)
+        callees = [callee for _, callees in repo_cg for callee in callees]
+
+        # one object per (id, callee type)
+        local = [c for c in callees if c.id == "pkg.mod.local"]
+        self.assertEqual(
+            {c.type for c in local}, {CalleeType.LOCAL, CalleeType.EXTERNAL}
+        )
+        self.assertIs(local[0], repo_cg.intern("pkg.mod.local", local[0].type))
+
+        caller = next(c for c in repo_cg.call_graph if c.id == "pkg.util.Class.method")
+        self.assertIs(caller, repo_cg.intern("pkg.util.Class.method"))
+        self.assertFalse(hasattr(caller, "__dict__"))
+
+    def test_compact_call_graph(self):
+        repo_cg = RepoCallGraph(self.repo_path, PYCG_DICT)
+        compact_cg = CompactCallGraph.from_repo_cg(repo_cg)
+
+        self.assertEqual(compact_cg.as_dict(), repo_cg.as_dict())
+        for caller, callees in compact_cg:
+            self.assertEqual(
+                [(c.id, c.type) for c in callees],
+                [(c.id, c.type) for c in repo_cg.call_graph[caller]],
+            )
+        for callee, callers in repo_cg.inv_call_graph.items():
+            self.assertCountEqual(compact_cg.callers_of(callee), callers)
+
+        self.assertEqual(
+            set(compact_cg.reachable("pkg.mod.local", inverse=True)),
+            {"pkg.mod.caller", "pkg.util.Class.method"},
+        )
+        self.assertNotIn("pkg.missing", compact_cg)
+
+    def test_compact_binary_format(self):
+        compact_cg = CompactCallGraph.from_pycg(self.repo_path, PYCG_DICT)
+        file_path = os.path.join(self.repo_path, "cg.bin")
+        compact_cg.write_binary(file_path)
+
+        with CompactCallGraph.open_binary(file_path) as mapped_cg:
+            self.assertEqual(mapped_cg.repo_path, self.repo_path)
+            self.assertEqual(mapped_cg.as_dict(), compact_cg.as_dict())
+            self.assertEqual(
+                [(c.id, c.type) for c in mapped_cg.callees_of("pkg.mod.caller")],
+                [(c.id, c.type) for c in compact_cg.callees_of("pkg.mod.caller")],
+            )
+            self.assertEqual(
+                list(mapped_cg.reachable("pkg.mod.local", inverse=True)),
+                list(compact_cg.reachable("pkg.mod.local", inverse=True)),
+            )
+
+            # lookups do not hold on to the file map
+            i = mapped_cg.index_of("pkg.mod.caller")
+            callees = mapped_cg.callee_indices(i)
+            callers = mapped_cg.caller_indices(mapped_cg.index_of("pkg.mod.local"))
+            reachable = mapped_cg.reachable("pkg.mod.caller")
+            next(reachable)
+
+        self.assertIsNone(mapped_cg.mmap)
+        self.assertEqual(callees, compact_cg.callee_indices(i))
+        self.assertEqual(len(callers), 2)
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase, mock
+
+from yappy.callgraph import pycg
+from yappy.callgraph.pycg import (
+    LazySanityChecks,
+    RepoCallGraph,
+    sanity_cg,
+)
+
+PYCG_DICT = {
+    "mod.caller": ["mod.helper", "mod.Class.method", "<builtin>.print"],
+    "mod.Class.method": ["mod.helper"],
+    "mod.helper": [],
+    "mod.missing": ["mod.helper"],
+}
+
+
+class TestSanityChecks(TestCase):
+    def setUp(self):
+        self.repo_path = tempfile.mkdtemp()
+        with open(os.path.join(self.repo_path, "mod.py"), "w") as f:
+            f.write("def helper(): pass\n")
+            f.write("class Class:\n    def method(self):\n        return helper()\n")
+            f.write("def caller():\n    '''helper, method'''\n    print(helper())\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.repo_path)
+
+    def test_sanity_checks(self):
+        checks = sanity_cg(self.repo_path, PYCG_DICT)
+
+        self.assertEqual(set(checks), {"mod.caller", "mod.Class.method", "mod.missing"})
+        self.assertEqual(checks["mod.caller"]["callcount"], 3)
+        self.assertEqual(checks["mod.caller"]["uninvokedcalls"], 1)
+        self.assertEqual(checks["mod.caller"]["unknowncalls"], 1)
+        self.assertEqual(checks["mod.Class.method"]["warnings"], [])
+        self.assertEqual(
+            checks["mod.missing"]["warnings"], ["Caller not defined in file."]
+        )
+
+    def test_parses_each_file_once(self):
+        repo_cg = RepoCallGraph(self.repo_path, PYCG_DICT)
+        with mock.patch.object(
+            pycg, "build_ast_file", wraps=pycg.build_ast_file
+        ) as build_ast_file:
+            checks = sanity_cg(self.repo_path, repo_cg)
+            build_ast_file.assert_called_once()
+
+        self.assertEqual(checks, sanity_cg(self.repo_path, PYCG_DICT))
+
+    def test_parallel_sanity_checks(self):
+        with open(os.path.join(self.repo_path, "other.py"), "w") as f:
+            f.write("from mod import helper\ndef run():\n    helper()\n")
+        pycg_dict = {**PYCG_DICT, "other.run": ["mod.helper"]}
+
+        serial = sanity_cg(self.repo_path, pycg_dict)
+        parallel = sanity_cg(self.repo_path, pycg_dict, workers=2)
+
+        self.assertEqual(list(parallel.items()), list(serial.items()))
+        self.assertEqual(parallel["other.run"]["warnings"], [])
+
+    def test_callee_in_body_matches_identifiers(self):
+        with open(os.path.join(self.repo_path, "ids.py"), "w") as f:
+            f.write("import mod\ndef helpers(): pass\n")
+            f.write("def run():\n    mod.helper()\n    helpers()\n")
+            f.write("def near():\n    helpers()\n")
+        pycg_dict = {
+            "ids.run": ["mod.helper", "ids.helpers"],
+            "ids.near": ["mod.helper"],
+        }
+
+        checks = sanity_cg(self.repo_path, pycg_dict)
+
+        self.assertEqual(checks["ids.run"]["uninvokedcalls"], 0)
+        # "helper" is only a substring of "helpers" in near's body
+        self.assertEqual(checks["ids.near"]["uninvokedcalls"], 1)
+
+    def test_lazy_sanity_checks(self):
+        with mock.patch.object(
+            pycg, "build_ast_file", wraps=pycg.build_ast_file
+        ) as build_ast_file:
+            checks = LazySanityChecks(self.repo_path, PYCG_DICT)
+            build_ast_file.assert_not_called()
+
+            self.assertEqual(checks["mod.caller"]["callcount"], 3)
+            self.assertEqual(checks["mod.missing"]["callcount"], 0)
+            build_ast_file.assert_called_once()
+
+        self.assertEqual(dict(checks), sanity_cg(self.repo_path, PYCG_DICT))
+        self.assertNotIn("mod.helper", checks)
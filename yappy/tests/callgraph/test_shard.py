@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from yappy.callgraph.pycg import SanityMode, construct_cg
+from yappy.callgraph.shard import (
+    ROOT_SHARD,
+    resolve_name,
+    shard_repo_files,
+    summarize_shard,
+)
+
+FILES = {
+    "lib/__init__.py": "from lib.core import Engine, run as go\n",
+    "lib/core.py": (
+        "class Engine:\n"
+        "    def __init__(self): pass\n"
+        "    def start(self): return helper()\n"
+        "def helper(): pass\n"
+        "def run(): return helper()\n"
+    ),
+    "lib/plain.py": "class Plain:\n    def m(self): pass\n",
+    "app/__init__.py": "",
+    "app/main.py": (
+        "import lib.core\n"
+        "from lib import Engine, go\n"
+        "from lib.core import helper as h\n"
+        "from lib.plain import Plain\n"
+        "def main():\n"
+        "    e = Engine()\n"
+        "    e.start()\n"
+        "    go()\n"
+        "    h()\n"
+        "    lib.core.run()\n"
+        "    Plain()\n"
+    ),
+    "script.py": "from app.main import main\nmain()\n",
+}
+
+
+class TestShardedCallGraph(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.repo_path = os.path.join(self.temp_dir, "repo")
+        for file, source in FILES.items():
+            file_path = os.path.join(self.repo_path, file)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "w") as f:
+                f.write(source)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_shard_repo_files(self):
+        files = [os.path.join(self.repo_path, file) for file in FILES]
+        shards = shard_repo_files(self.repo_path, files)
+
+        self.assertEqual(set(shards), {"lib", "app", ROOT_SHARD})
+        self.assertEqual(
+            shards[ROOT_SHARD], [os.path.join(self.repo_path, "script.py")]
+        )
+
+    def test_resolve_name(self):
+        files = [os.path.join(self.repo_path, file) for file in FILES]
+        shards = shard_repo_files(self.repo_path, files)
+        summaries = {
+            shard: summarize_shard(self.repo_path, files)
+            for shard, files in shards.items()
+        }
+        owners = {"lib": "lib", "app": "app", "script": ROOT_SHARD}
+
+        def resolve(name):
+            return resolve_name(name, summaries, owners)
+
+        self.assertEqual(resolve("lib.go"), "lib.core.run")
+        self.assertEqual(resolve("lib.Engine"), "lib.core.Engine.__init__")
+        self.assertEqual(resolve("lib.Engine.start"), "lib.core.Engine.start")
+        self.assertEqual(resolve("app.main.h"), "lib.core.helper")
+        self.assertIsNone(resolve("app.main.Plain"))
+        self.assertEqual(resolve("os.path.join"), "os.path.join")
+
+    def test_sharded_matches_full(self):
+        full, _, _ = construct_cg(self.repo_path, sanity=SanityMode.SKIP)
+
+        # mirrors of previous runs are dropped
+        stale_shard = os.path.join(self.repo_path + "_temp_shards", "deleted")
+        os.makedirs(stale_shard)
+        sharded, _, _ = construct_cg(
+            self.repo_path, sanity=SanityMode.SKIP, shard=True, workers=2
+        )
+
+        self.assertEqual(
+            {caller: set(callees) for caller, callees in sharded.items()},
+            {caller: set(callees) for caller, callees in full.items()},
+        )
+        self.assertIn("lib.core.Engine.__init__", sharded["app.main.main"])
+        # classes without __init__ have no constructor to call
+        self.assertNotIn("lib.plain.Plain", sharded["app.main.main"])
+        self.assertFalse(os.path.exists(stale_shard))
@@ -0,0 +1,47 @@
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from yappy.callgraph.stream import JSONStreamReader, iter_pycg_json
+
+PYCG_DICT = {
+    "pkg.mod.caller": ["pkg.mod.callee", "<builtin>.len"],
+    "pkg.mod.callee": [],
+    "pkg.mod." + "x" * 1000: ["pkg.mod.callee"],
+}
+
+
+class TestStreamingJSON(TestCase):
+    def setUp(self):
+        fd, self.file_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.file_path)
+
+    def test_iter_pycg_json(self):
+        for indent in (None, 4):
+            with open(self.file_path, "w") as f:
+                json.dump(PYCG_DICT, f, indent=indent)
+            self.assertEqual(
+                list(iter_pycg_json(self.file_path)), list(PYCG_DICT.items())
+            )
+
+    def test_iter_pycg_json_lines(self):
+        with open(self.file_path, "w") as f:
+            f.write('{"pkg.mod.caller": ["pkg.mod.callee"]}\n\n')
+            f.write('["pkg.mod.callee", []]\n')
+        self.assertEqual(
+            list(iter_pycg_json(self.file_path, lines=True)),
+            [("pkg.mod.caller", ["pkg.mod.callee"]), ("pkg.mod.callee", [])],
+        )
+
+    def test_reader_small_chunks(self):
+        reader = JSONStreamReader(io.StringIO(json.dumps(PYCG_DICT)), chunk_size=3)
+        reader.expect("{")
+        self.assertEqual(reader.decode(), "pkg.mod.caller")
+        reader.expect(":")
+        self.assertEqual(reader.decode(), PYCG_DICT["pkg.mod.caller"])
+        self.assertEqual(reader.expect(",}"), ",")
@@ -0,0 +1,80 @@
+import shutil
+import textwrap
+import tempfile
+from unittest import TestCase, mock
+
+from yappy.pdg import cache as cache_module
+from yappy.pdg.cache import PDGCache, hash_source
+
+CODE = """def foo(x, y):
+    z = x + 1
+    if y:
+        z = bar(z)
+    return z
+"""
+
+# same function, indented and with end-of-line comments
+INDENTED_CODE = """    def foo(x, y):
+        z = x + 1  # increment
+        if y:
+            z = bar(z)
+        return z
+"""
+
+# same function, on other lines
+REFORMATTED_CODE = """
+    def foo(x, y):
+        # increment
+        z = x + 1
+
+        if y:
+            z = bar(z)
+        return z
+"""
+
+
+class TestPDGCache(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_hash_source(self):
+        self.assertEqual(hash_source(CODE), hash_source(INDENTED_CODE))
+        self.assertNotEqual(hash_source(CODE), hash_source(REFORMATTED_CODE))
+        self.assertNotEqual(hash_source(CODE), hash_source(CODE.replace("1", "2")))
+
+    def test_memory_tier(self):
+        cache = PDGCache(maxsize=1)
+        pdg = cache.get_pdg(CODE)
+        self.assertIs(cache.get_pdg(INDENTED_CODE), pdg)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # evicts foo
+        cache.get_pdg("def baz():\n    return 1\n")
+        self.assertIsNot(cache.get_pdg(CODE), pdg)
+        self.assertEqual(cache.misses, 3)
+
+    def test_line_numbers_match_source(self):
+        cache = PDGCache()
+        cache.get_pdg(CODE)
+
+        # highlighted slices rely on the line numbers of the PDG's nodes
+        pdg = cache.get_pdg(textwrap.dedent(REFORMATTED_CODE))
+        self.assertEqual(pdg.get_node_by_source("return z").ast_node.lineno, 8)
+        self.assertEqual(cache.misses, 2)
+
+    def test_disk_tier(self):
+        pdg = PDGCache(cache_dir=self.cache_dir).get_pdg(CODE)
+
+        cache = PDGCache(cache_dir=self.cache_dir)
+        with mock.patch.object(cache_module, "construct_pdg") as construct_pdg:
+            loaded = cache.get_pdg(CODE)
+            construct_pdg.assert_not_called()
+
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(loaded.nodes), len(pdg.nodes))
+        node = loaded.get_node_by_source("return z")
+        self.assertEqual(len(loaded.outgoing_neighbors(node)), 2)
+        self.assertIs(loaded.get_node_by_ast_node(node.ast_node), node)
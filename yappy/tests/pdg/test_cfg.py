@@ -0,0 +1,121 @@
+import pickle
+from unittest import TestCase
+
+import gast as ast
+from python_graphs.program_graph import ProgramGraph
+from python_graphs.program_utils import program_to_ast
+
+import yappy.pdg.cfg as control_flow
+from yappy.pdg.pypdg import construct_pdg
+from yappy.tests.pdg.test_postdom import PROGRAMS
+
+
+class TestAstNodeIndex(TestCase):
+    def assert_index_matches_scan(self, cfg, program_node):
+        for node in ast.walk(program_node):
+            self.assertEqual(
+                list(cfg.get_control_flow_nodes_by_ast_node(node)),
+                [cfn for cfn in cfg.nodes if cfn.instruction.node is node],
+            )
+            self.assertEqual(
+                set(cfg.get_blocks_by_ast_node(node)),
+                {
+                    block
+                    for block in cfg.blocks
+                    for cfn in block.control_flow_nodes
+                    if cfn.instruction.node is node
+                },
+            )
+            for block in cfg.blocks:
+                if block.node is node:
+                    self.assertIs(
+                        cfg.get_block_by_ast_node_and_label(node, block.label), block
+                    )
+
+    def test_index_matches_scan(self):
+        for program in PROGRAMS:
+            program_node = program_to_ast(program)
+            cfg = control_flow.get_control_flow_graph(program_node)
+            self.assert_index_matches_scan(cfg, program_node)
+
+    def test_index_survives_pickling(self):
+        program_node = program_to_ast(PROGRAMS[0])
+        cfg = control_flow.get_control_flow_graph(program_node)
+
+        loaded_program_node, loaded_cfg = pickle.loads(
+            pickle.dumps((program_node, cfg))
+        )
+        self.assert_index_matches_scan(loaded_cfg, loaded_program_node)
+
+    def test_pickle_blocks_and_nodes(self):
+        program_node = program_to_ast(PROGRAMS[0])
+        cfg = control_flow.get_control_flow_graph(program_node)
+
+        # blocks and nodes refer to their graph, which is unpickled around them
+        for obj in (cfg.start_block, cfg.nodes[0], cfg.nodes[-1].block):
+            loaded = pickle.loads(pickle.dumps((program_node, obj)))
+            loaded_program_node, loaded_obj = loaded
+            self.assert_index_matches_scan(loaded_obj.graph, loaded_program_node)
+
+
+class TestSourceIndex(TestCase):
+    def get_queries(self, program_node):
+        for node in ast.walk(program_node):
+            if isinstance(node, (ast.expr, ast.stmt)):
+                yield ast.unparse(node)
+        yield "x"
+        yield "missing()"
+
+    def test_index_matches_scan(self):
+        for program in PROGRAMS:
+            program_node = program_to_ast(program)
+            cfg = control_flow.get_control_flow_graph(program_node)
+            pdg = construct_pdg(program_node)
+
+            for source in self.get_queries(program_node):
+                node = ast.parse(source).body[0]
+                if isinstance(node, ast.Expr):
+                    node = node.value
+
+                self.assertEqual(
+                    list(cfg.get_control_flow_nodes_by_source(source)),
+                    [
+                        cfn
+                        for cfn in cfg.nodes
+                        if cfn.instruction.contains_subprogram(node)
+                    ],
+                )
+                self.assertEqual(
+                    list(pdg.get_nodes_by_source(source)),
+                    list(ProgramGraph.get_nodes_by_source(pdg, source)),
+                )
+
+    def test_lists_match_exactly(self):
+        cfg = control_flow.get_control_flow_graph(program_to_ast(PROGRAMS[2]))
+        self.assertEqual(len(list(cfg.get_control_flow_nodes_by_source("bar(x)"))), 1)
+        self.assertEqual(list(cfg.get_control_flow_nodes_by_source("bar(x, y)")), [])
+        self.assertEqual(list(cfg.get_control_flow_nodes_by_source("bar()")), [])
+
+    def test_index_survives_pickling(self):
+        program_node = program_to_ast(PROGRAMS[2])
+        pdg = pickle.loads(pickle.dumps(construct_pdg(program_node)))
+
+        node = pdg.get_node_by_source("bar(x)")
+        self.assertEqual(ast.unparse(node.ast_node).strip(), "x = bar(x)")
+
+
+class TestControlFlowNodeIds(TestCase):
+    def assert_ids_and_indexes(self, cfg):
+        self.assertEqual(
+            sorted(cfn.id for cfn in cfg.nodes), list(range(len(cfg.nodes)))
+        )
+        for block in cfg.blocks:
+            for index, cfn in enumerate(block.control_flow_nodes):
+                self.assertIs(cfn.block, block)
+                self.assertEqual(block.index_of(cfn), index)
+
+    def test_ids_and_indexes(self):
+        for program in PROGRAMS:
+            cfg = control_flow.get_control_flow_graph(program_to_ast(program))
+            self.assert_ids_and_indexes(cfg)
+            self.assert_ids_and_indexes(pickle.loads(pickle.dumps(cfg)))
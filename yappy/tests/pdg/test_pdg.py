@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from python_graphs.program_utils import program_to_ast
+
+from yappy.pdg.pypdg import construct_pdg
+from yappy.pdg.utils import PDGEdgeType
+from yappy.tests.pdg.test_postdom import PROGRAMS
+
+
+def control_dependences(pdg):
+    return {(edge.id1, edge.id2) for edge in pdg.edges if edge.type == PDGEdgeType.CD}
+
+
+class TestControlDependence(TestCase):
+    def test_matches_definition(self):
+        for program in PROGRAMS:
+            pdg = construct_pdg(program_to_ast(program))
+            tree = pdg.pdom_tree
+
+            # C is control dependent on A iff C post-dominates a successor of A,
+            # but does not strictly post-dominate A
+            expected = set()
+            for cfg_nodeA, nodeA in pdg.cfg_to_pdg_nodes.items():
+                for cfg_nodeC, nodeC in pdg.cfg_to_pdg_nodes.items():
+                    if nodeC.id == nodeA.id:
+                        continue
+                    if tree.post_dominates(cfg_nodeC, cfg_nodeA):
+                        continue
+                    if any(
+                        tree.post_dominates(cfg_nodeC, cfg_nodeB)
+                        for cfg_nodeB in cfg_nodeA.next
+                    ):
+                        expected.add((nodeC.id, nodeA.id))
+
+            self.assertEqual(control_dependences(pdg), expected)
+
+    def test_branch_to_exit(self):
+        program_node = program_to_ast(PROGRAMS[1])
+        pdg = construct_pdg(program_node)
+
+        # if x: return 1
+        if_node = program_node.body[0].body[0]
+        return_node = pdg.get_node_by_ast_node(if_node.body[0])
+        test_node = pdg.get_node_by_ast_node(if_node.test)
+
+        self.assertIn((return_node.id, test_node.id), control_dependences(pdg))
@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from python_graphs.program_utils import program_to_ast
+
+import yappy.pdg.cfg as control_flow
+from yappy.pdg.utils import (
+    PostDominatorTree,
+    immediate_post_dominator,
+    post_dominators,
+)
+
+PROGRAMS = [
+    """def foo(x, y):
+    x = x + 1
+    for i in range(y):
+        if i % 2 == 0:
+            x = x + 2
+        else:
+            x = x + 3
+            continue
+        y = y - 1
+    return x
+""",
+    """def foo(x):
+    if x:
+        return 1
+    x = x + 1
+    while x > 0:
+        x = x - 1
+        if x == 5:
+            break
+    return x
+""",
+    """def foo(x):
+    try:
+        x = bar(x)
+    except ValueError:
+        x = 0
+    finally:
+        y = x
+    with open(x) as f:
+        y = f.read()
+    return y
+""",
+]
+
+
+class TestPostDominatorTree(TestCase):
+    def test_matches_iterative_post_dominators(self):
+        for program in PROGRAMS:
+            cfg = control_flow.get_control_flow_graph(program_to_ast(program))
+            pdom = post_dominators(cfg)
+            tree = PostDominatorTree(cfg)
+
+            self.assertEqual(tree.ipdom, immediate_post_dominator(pdom))
+            for u in cfg.get_control_flow_nodes():
+                for v in cfg.get_control_flow_nodes():
+                    self.assertEqual(tree.post_dominates(u, v), u in pdom[v])
+
+    def test_multiple_exits(self):
+        cfg = control_flow.get_control_flow_graph(program_to_ast(PROGRAMS[1]))
+        tree = PostDominatorTree(cfg)
+
+        # the entry reaches both returns: only the virtual exit post-dominates it
+        first = cfg.get_control_flow_nodes()[0]
+        self.assertNotIn(first, tree.ipdom)
+        for node in cfg.get_control_flow_nodes():
+            if not node.next:
+                self.assertNotIn(node, tree.ipdom)
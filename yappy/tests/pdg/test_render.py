@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from python_graphs.program_utils import program_to_ast
+
+from yappy.pdg.pypdg import construct_pdg
+
+CODE = """def foo(x):
+    if x:
+        x = x + 1
+    return x
+"""
+
+
+class TestPDGRendering(TestCase):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.temp_dir)
+
+    def test_no_rendering_by_default(self):
+        construct_pdg(program_to_ast(CODE))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_render_to(self):
+        render_dir = os.path.join(self.temp_dir, "graphs")
+        construct_pdg(program_to_ast(CODE), render_to=render_dir)
+        construct_pdg(program_to_ast(CODE), render_to=render_dir)
+
+        files = os.listdir(render_dir)
+        self.assertEqual(len(files), 4)
+        self.assertTrue(all(file.startswith("foo-") for file in files))
+        self.assertEqual(sum(file.endswith("-pdg.png") for file in files), 2)